@@ -2,6 +2,7 @@ from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
+from app.database import DATABASE_URL
 from app.models import Base 
 from alembic import context
 
@@ -14,6 +15,10 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# Migrate the database the app connects to (DATABASE_URL), not the
+# placeholder URL in alembic.ini. "%" is escaped for configparser.
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
@@ -57,6 +62,15 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # A caller may pass its own connection (e.g. the tests migrating a
+    # temporary database) via Config.attributes
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -0,0 +1,109 @@
+"""shift line items
+
+Revision ID: 0b68178b63f7
+Revises: ad245ad754a0
+Create Date: 2026-10-17 16:37:12.448061
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b68178b63f7'
+down_revision: Union[str, Sequence[str], None] = 'ad245ad754a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_CHUNK = 1000
+
+shift_entries = sa.table(
+    'shift_entries',
+    sa.column('id', sa.Integer()),
+    sa.column('organization_id', sa.Integer()),
+    sa.column('batch_id', sa.Integer()),
+    sa.column('date', sa.Date()),
+    sa.column('input_materials', sa.JSON()),
+    sa.column('output_products', sa.JSON()),
+)
+
+
+def _as_float(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _line_items(shift):
+    """Same interpretation as app/metrics.amount_and_price."""
+    shift_id, organization_id, batch_id, shift_date, input_materials, output_products = shift
+    base = {'organization_id': organization_id, 'shift_id': shift_id, 'batch_id': batch_id, 'date': shift_date}
+    rows = []
+    for kind, values in (('input', input_materials), ('output', output_products)):
+        if not isinstance(values, dict):
+            continue
+        for name, val in values.items():
+            if isinstance(val, dict):
+                amount, unit_price = _as_float(val.get('amount')), _as_float(val.get('unit_price'))
+            else:
+                amount, unit_price = _as_float(val), 0.0
+            rows.append({**base, 'kind': kind, 'field_name': str(name), 'amount': amount,
+                         'unit_price': unit_price if kind == 'input' else None})
+    return rows
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    line_items = op.create_table('shift_line_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('shift_id', sa.Integer(), nullable=False),
+    sa.Column('batch_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('kind', sa.String(length=6), nullable=False),
+    sa.Column('field_name', sa.String(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=18, scale=4), nullable=False),
+    sa.Column('unit_price', sa.Numeric(precision=18, scale=4), nullable=True),
+    sa.ForeignKeyConstraint(['batch_id'], ['batches.id'], ),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.ForeignKeyConstraint(['shift_id'], ['shift_entries.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # Backfill from the JSON columns in keyset chunks, before indexing
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        shifts = conn.execute(
+            sa.select(
+                shift_entries.c.id, shift_entries.c.organization_id, shift_entries.c.batch_id,
+                shift_entries.c.date, shift_entries.c.input_materials, shift_entries.c.output_products,
+            )
+            .where(shift_entries.c.id > last_id)
+            .order_by(shift_entries.c.id)
+            .limit(BACKFILL_CHUNK)
+        ).all()
+        if not shifts:
+            break
+        rows = [row for shift in shifts for row in _line_items(shift)]
+        if rows:
+            conn.execute(line_items.insert(), rows)
+        last_id = shifts[-1][0]
+
+    op.create_index(op.f('ix_shift_line_items_id'), 'shift_line_items', ['id'], unique=False)
+    op.create_index(op.f('ix_shift_line_items_shift_id'), 'shift_line_items', ['shift_id'], unique=False)
+    op.create_index('ix_shift_line_items_org_field_date', 'shift_line_items', ['organization_id', 'field_name', 'date'], unique=False)
+    op.create_index('ix_shift_line_items_batch_kind_field', 'shift_line_items', ['batch_id', 'kind', 'field_name'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_shift_line_items_batch_kind_field', table_name='shift_line_items')
+    op.drop_index('ix_shift_line_items_org_field_date', table_name='shift_line_items')
+    op.drop_index(op.f('ix_shift_line_items_shift_id'), table_name='shift_line_items')
+    op.drop_index(op.f('ix_shift_line_items_id'), table_name='shift_line_items')
+    op.drop_table('shift_line_items')
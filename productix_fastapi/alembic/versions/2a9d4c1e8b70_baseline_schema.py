@@ -0,0 +1,218 @@
+"""baseline schema
+
+The tables as they were before the first tracked revision, so that
+`alembic upgrade head` can build an empty database. Databases created
+before Alembic was introduced already have them and skip this step.
+
+Revision ID: 2a9d4c1e8b70
+Revises:
+Create Date: 2026-10-17 18:12:40.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2a9d4c1e8b70'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if sa.inspect(op.get_bind()).has_table('organizations'):
+        return  # pre-Alembic database: the baseline tables exist
+
+    op.create_table('organizations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('subscription_plan', sa.String(length=50), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id', name='organizations_pkey'),
+    sa.UniqueConstraint('name', name='organizations_name_key')
+    )
+    op.create_index('ix_organizations_id', 'organizations', ['id'], unique=False)
+    op.create_table('ai_data',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=True),
+    sa.Column('data_json', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], name='ai_data_organization_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='ai_data_pkey')
+    )
+    op.create_index('ix_ai_data_id', 'ai_data', ['id'], unique=False)
+    op.create_table('invitations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('role', sa.Enum('system_admin', 'org_admin', 'org_user', name='userrole'), nullable=False),
+    sa.Column('token', sa.String(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('accepted', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], name='invitations_organization_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='invitations_pkey'),
+    sa.UniqueConstraint('token', name='invitations_token_key')
+    )
+    op.create_index('ix_invitations_id', 'invitations', ['id'], unique=False)
+    op.create_table('products',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('input_fields', sa.JSON(), nullable=True),
+    sa.Column('output_fields', sa.JSON(), nullable=True),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], name='products_organization_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='products_pkey')
+    )
+    op.create_index('ix_products_id', 'products', ['id'], unique=False)
+    op.create_table('subscriptions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('plan_name', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('start_date', sa.DateTime(), nullable=True),
+    sa.Column('end_date', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], name='subscriptions_organization_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='subscriptions_pkey')
+    )
+    op.create_index('ix_subscriptions_id', 'subscriptions', ['id'], unique=False)
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=True),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('password_hash', sa.String(length=255), nullable=False),
+    sa.Column('role', sa.Enum('system_admin', 'org_admin', 'org_user', name='userrole'), nullable=False),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], name='users_organization_id_fkey', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name='users_pkey')
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_id', 'users', ['id'], unique=False)
+    op.create_table('ai_analysis',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('efficiency_score', sa.String(), nullable=True),
+    sa.Column('ai_prediction', sa.Text(), nullable=True),
+    sa.Column('top_inefficiencies', sa.Text(), nullable=True),
+    sa.Column('ai_prescriptions', sa.Text(), nullable=True),
+    sa.Column('request_data', sa.JSON(), nullable=False),
+    sa.Column('combined_productivity', sa.String(), nullable=True),
+    sa.Column('targeted_productivity', sa.String(), nullable=True),
+    sa.Column('standard_productivity', sa.String(), nullable=True),
+    sa.Column('inputs', sa.JSON(), nullable=True),
+    sa.Column('outputs', sa.JSON(), nullable=True),
+    sa.Column('single_productivity', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], name='ai_analysis_organization_id_fkey'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='ai_analysis_user_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='ai_analysis_pkey')
+    )
+    op.create_index('ix_ai_analysis_id', 'ai_analysis', ['id'], unique=False)
+    op.create_table('ai_reports',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('goal', sa.Text(), nullable=False),
+    sa.Column('plan', sa.Text(), nullable=False),
+    sa.Column('report', sa.Text(), nullable=False),
+    sa.Column('records_used', sa.JSON(), nullable=True),
+    sa.Column('request_data', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], name='ai_reports_organization_id_fkey'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='ai_reports_user_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='ai_reports_pkey')
+    )
+    op.create_index('ix_ai_reports_id', 'ai_reports', ['id'], unique=False)
+    op.create_table('batches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('batch_number', sa.String(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=True),
+    sa.Column('status', sa.Enum('open', 'closed', name='batchstatus'), nullable=True),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], name='batches_organization_id_fkey'),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], name='batches_product_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='batches_pkey')
+    )
+    op.create_index('ix_batches_id', 'batches', ['id'], unique=False)
+    op.create_table('chatbot_history',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('query', sa.Text(), nullable=False),
+    sa.Column('response', sa.Text(), nullable=False),
+    sa.Column('records', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], name='chatbot_history_organization_id_fkey'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='chatbot_history_user_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='chatbot_history_pkey')
+    )
+    op.create_index('ix_chatbot_history_id', 'chatbot_history', ['id'], unique=False)
+    op.create_table('productivity_calculations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('combined_productivity', sa.String(), nullable=False),
+    sa.Column('single_productivity', sa.JSON(), nullable=False),
+    sa.Column('processed_inputs', sa.JSON(), nullable=False),
+    sa.Column('processed_outputs', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], name='productivity_calculations_organization_id_fkey'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='productivity_calculations_user_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='productivity_calculations_pkey')
+    )
+    op.create_index('ix_productivity_calculations_id', 'productivity_calculations', ['id'], unique=False)
+    op.create_table('shift_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('batch_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('shift_no', sa.String(), nullable=False),
+    sa.Column('admin_notes', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['batch_id'], ['batches.id'], name='shift_entries_batch_id_fkey'),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], name='shift_entries_organization_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='shift_entries_pkey')
+    )
+    op.create_index('ix_shift_entries_id', 'shift_entries', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+# ### commands auto generated by Alembic - please adjust! ###
+    op.drop_index('ix_shift_entries_id', table_name='shift_entries')
+    op.drop_table('shift_entries')
+    op.drop_index('ix_productivity_calculations_id', table_name='productivity_calculations')
+    op.drop_table('productivity_calculations')
+    op.drop_index('ix_chatbot_history_id', table_name='chatbot_history')
+    op.drop_table('chatbot_history')
+    op.drop_index('ix_batches_id', table_name='batches')
+    op.drop_table('batches')
+    op.drop_index('ix_ai_reports_id', table_name='ai_reports')
+    op.drop_table('ai_reports')
+    op.drop_index('ix_ai_analysis_id', table_name='ai_analysis')
+    op.drop_table('ai_analysis')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_table('users')
+    op.drop_index('ix_subscriptions_id', table_name='subscriptions')
+    op.drop_table('subscriptions')
+    op.drop_index('ix_products_id', table_name='products')
+    op.drop_table('products')
+    op.drop_index('ix_invitations_id', table_name='invitations')
+    op.drop_table('invitations')
+    op.drop_index('ix_ai_data_id', table_name='ai_data')
+    op.drop_table('ai_data')
+    op.drop_index('ix_organizations_id', table_name='organizations')
+    op.drop_table('organizations')
+    sa.Enum(name='batchstatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='userrole').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,28 @@
+"""file upload worker
+
+Revision ID: 5c2e9a7f41d3
+Revises: 0b68178b63f7
+Create Date: 2026-10-17 16:05:42.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e9a7f41d3'
+down_revision: Union[str, Sequence[str], None] = '0b68178b63f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('file_uploads', sa.Column('worker_id', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('file_uploads', 'worker_id')
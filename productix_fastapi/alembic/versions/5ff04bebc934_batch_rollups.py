@@ -0,0 +1,121 @@
+"""batch rollups
+
+Revision ID: 5ff04bebc934
+Revises: 998993d28104
+Create Date: 2026-10-17 10:02:15.530417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5ff04bebc934'
+down_revision: Union[str, Sequence[str], None] = '998993d28104'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_CHUNK = 1000
+
+batches = sa.table(
+    'batches',
+    sa.column('id', sa.Integer()),
+    sa.column('organization_id', sa.Integer()),
+)
+
+shift_entries = sa.table(
+    'shift_entries',
+    sa.column('id', sa.Integer()),
+    sa.column('batch_id', sa.Integer()),
+    sa.column('input_materials', sa.JSON()),
+    sa.column('output_products', sa.JSON()),
+)
+
+
+def _as_float(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _amount_and_price(val):
+    """Same interpretation as app/metrics.amount_and_price."""
+    if isinstance(val, dict):
+        return _as_float(val.get('amount')), _as_float(val.get('unit_price'))
+    return _as_float(val), 0.0
+
+
+def _fold(rollup, input_materials, output_products):
+    """Adds one shift to a rollup, like app/rollups._fold (shifts come in id order)."""
+    inputs, outputs = rollup['inputs'], rollup['outputs']
+    for name, val in (input_materials if isinstance(input_materials, dict) else {}).items():
+        amount, unit_price = _amount_and_price(val)
+        stats = inputs.setdefault(
+            str(name), {'amount': 0.0, 'cost': 0.0, 'unit_price': 0.0, 'entries': 0, 'missing_price': 0}
+        )
+        stats['amount'] += amount
+        stats['cost'] += amount * unit_price
+        stats['entries'] += 1
+        if unit_price == 0:
+            stats['missing_price'] += 1
+        stats['unit_price'] = unit_price  # latest price seen
+    for name, val in (output_products if isinstance(output_products, dict) else {}).items():
+        stats = outputs.setdefault(str(name), {'amount': 0.0, 'entries': 0})
+        stats['amount'] += _amount_and_price(val)[0]
+        stats['entries'] += 1
+    rollup['shift_count'] += 1
+
+
+def _backfill(rollups):
+    """One row per existing batch, folded from its shifts in keyset chunks."""
+    conn = op.get_bind()
+    rows = {
+        batch_id: {'batch_id': batch_id, 'organization_id': organization_id,
+                   'inputs': {}, 'outputs': {}, 'shift_count': 0}
+        for batch_id, organization_id in conn.execute(sa.select(batches.c.id, batches.c.organization_id))
+    }
+    last_id = 0
+    while True:
+        shifts = conn.execute(
+            sa.select(shift_entries.c.id, shift_entries.c.batch_id,
+                      shift_entries.c.input_materials, shift_entries.c.output_products)
+            .where(shift_entries.c.id > last_id)
+            .order_by(shift_entries.c.id)
+            .limit(BACKFILL_CHUNK)
+        ).all()
+        if not shifts:
+            break
+        for _, batch_id, input_materials, output_products in shifts:
+            if batch_id in rows:
+                _fold(rows[batch_id], input_materials, output_products)
+        last_id = shifts[-1][0]
+
+    values = list(rows.values())
+    for start in range(0, len(values), BACKFILL_CHUNK):
+        conn.execute(rollups.insert(), values[start:start + BACKFILL_CHUNK])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing batches are backfilled below; create_batch adds the row of new ones
+    rollups = op.create_table('batch_rollups',
+    sa.Column('batch_id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('inputs', sa.JSON(), nullable=False),
+    sa.Column('outputs', sa.JSON(), nullable=False),
+    sa.Column('shift_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['batch_id'], ['batches.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('batch_id')
+    )
+    _backfill(rollups)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('batch_rollups')
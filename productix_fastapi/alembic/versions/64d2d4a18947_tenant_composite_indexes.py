@@ -0,0 +1,44 @@
+"""tenant composite indexes
+
+Revision ID: 64d2d4a18947
+Revises: 7b21085757fc
+Create Date: 2026-10-17 15:41:27.514290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '64d2d4a18947'
+down_revision: Union[str, Sequence[str], None] = '7b21085757fc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_shift_entries_org_date', 'shift_entries', ['organization_id', 'date']),
+    ('ix_shift_entries_org_id', 'shift_entries', ['organization_id', 'id']),
+    ('ix_shift_entries_batch_date_shift', 'shift_entries', ['batch_id', 'date', 'shift_no']),
+    ('ix_batches_org_product_id', 'batches', ['organization_id', 'product_id', 'id']),
+    ('ix_batches_org_status', 'batches', ['organization_id', 'status']),
+    ('ix_batches_product_start_date', 'batches', ['product_id', 'start_date']),
+    ('ix_ai_analysis_org_id', 'ai_analysis', ['organization_id', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # On Postgres build without blocking writes to shift_entries / batches
+    concurrently = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=concurrently)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,48 @@
+"""name lookup indexes
+
+Revision ID: 7b21085757fc
+Revises: d41b7b206274
+Create Date: 2026-10-17 15:08:42.906113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b21085757fc'
+down_revision: Union[str, Sequence[str], None] = 'd41b7b206274'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_pg_trgm(catalog: str = 'pg_extension', column: str = 'extname') -> bool:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return False
+    return bind.exec_driver_sql(f"SELECT 1 FROM {catalog} WHERE {column} = 'pg_trgm'").first() is not None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_batches_org_batch_number', 'batches', ['organization_id', 'batch_number'], unique=False)
+    op.create_index('ix_products_org_name', 'products', ['organization_id', 'name'], unique=False)
+
+    # Trigram indexes only where the server ships pg_trgm; lookups fall back to ILIKE otherwise
+    if _has_pg_trgm('pg_available_extensions', 'name'):
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index('ix_batches_batch_number_trgm', 'batches', ['batch_number'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'batch_number': 'gin_trgm_ops'})
+        op.create_index('ix_products_name_trgm', 'products', ['name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _has_pg_trgm():
+        op.execute('DROP INDEX IF EXISTS ix_products_name_trgm')
+        op.execute('DROP INDEX IF EXISTS ix_batches_batch_number_trgm')
+    op.drop_index('ix_products_org_name', table_name='products')
+    op.drop_index('ix_batches_org_batch_number', table_name='batches')
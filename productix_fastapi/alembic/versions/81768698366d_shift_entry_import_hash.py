@@ -0,0 +1,29 @@
+"""shift entry import hash
+
+Revision ID: 81768698366d
+Revises: 5ff04bebc934
+Create Date: 2026-10-17 11:40:52.204718
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '81768698366d'
+down_revision: Union[str, Sequence[str], None] = '5ff04bebc934'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows keep NULL, so the first re-import rewrites them once
+    op.add_column('shift_entries', sa.Column('import_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('shift_entries', 'import_hash')
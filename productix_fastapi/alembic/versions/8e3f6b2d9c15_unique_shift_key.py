@@ -0,0 +1,54 @@
+"""unique shift key
+
+Revision ID: 8e3f6b2d9c15
+Revises: 5c2e9a7f41d3
+Create Date: 2026-10-17 19:04:51.772310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3f6b2d9c15'
+down_revision: Union[str, Sequence[str], None] = '5c2e9a7f41d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Shifts that a later row with the same (batch_id, date, shift_no) replaces;
+# the latest write (highest id) wins, like in the importer
+DUPLICATES = """
+    SELECT s.id FROM shift_entries s
+    JOIN shift_entries t
+      ON t.batch_id = s.batch_id AND t.date = s.date AND t.shift_no = s.shift_no AND t.id > s.id
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    batch_ids = [row[0] for row in conn.execute(sa.text(
+        f"SELECT DISTINCT batch_id FROM shift_entries WHERE id IN ({DUPLICATES})"
+    ))]
+    if batch_ids:
+        # Line items cascade on Postgres; SQLite does not enforce the foreign key
+        conn.execute(sa.text(f"DELETE FROM shift_line_items WHERE shift_id IN ({DUPLICATES})"))
+        conn.execute(sa.text(f"DELETE FROM shift_entries WHERE id IN ({DUPLICATES})"))
+        # Their rollups counted the removed rows; the app rebuilds a missing
+        # rollup on the batch's next shift write (reports compute it meanwhile)
+        conn.execute(
+            sa.text("DELETE FROM batch_rollups WHERE batch_id IN :ids").bindparams(sa.bindparam('ids', expanding=True)),
+            {'ids': batch_ids},
+        )
+
+    op.drop_index('ix_shift_entries_batch_date_shift', table_name='shift_entries')
+    op.create_index('ix_shift_entries_batch_date_shift', 'shift_entries', ['batch_id', 'date', 'shift_no'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_shift_entries_batch_date_shift', table_name='shift_entries')
+    op.create_index('ix_shift_entries_batch_date_shift', 'shift_entries', ['batch_id', 'date', 'shift_no'], unique=False)
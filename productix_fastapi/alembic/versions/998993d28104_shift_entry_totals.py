@@ -0,0 +1,93 @@
+"""shift entry totals
+
+Revision ID: 998993d28104
+Revises: 481a06085677
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '998993d28104'
+down_revision: Union[str, Sequence[str], None] = '481a06085677'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_CHUNK = 1000
+
+shift_entries = sa.table(
+    'shift_entries',
+    sa.column('id', sa.Integer()),
+    sa.column('input_materials', sa.JSON()),
+    sa.column('output_products', sa.JSON()),
+    sa.column('total_output', sa.Numeric(18, 4)),
+    sa.column('total_input_amount', sa.Numeric(18, 4)),
+    sa.column('total_input_cost', sa.Numeric(18, 4)),
+)
+
+
+def _as_float(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _totals(input_materials, output_products):
+    # Mirrors app.metrics.shift_totals as of this revision
+    total_input_amount = 0.0
+    total_input_cost = 0.0
+    for val in (input_materials or {}).values():
+        if isinstance(val, dict):
+            amount, unit_price = _as_float(val.get('amount')), _as_float(val.get('unit_price'))
+        else:
+            amount, unit_price = _as_float(val), 0.0
+        total_input_amount += amount
+        total_input_cost += amount * unit_price
+
+    total_output = 0.0
+    for val in (output_products or {}).values():
+        total_output += _as_float(val.get('amount')) if isinstance(val, dict) else _as_float(val)
+
+    return {
+        'total_output': total_output,
+        'total_input_amount': total_input_amount,
+        'total_input_cost': total_input_cost,
+    }
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('shift_entries', sa.Column('total_output', sa.Numeric(18, 4), server_default='0', nullable=False))
+    op.add_column('shift_entries', sa.Column('total_input_amount', sa.Numeric(18, 4), server_default='0', nullable=False))
+    op.add_column('shift_entries', sa.Column('total_input_cost', sa.Numeric(18, 4), server_default='0', nullable=False))
+
+    # Backfill existing rows in keyset-ordered chunks
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(shift_entries.c.id, shift_entries.c.input_materials, shift_entries.c.output_products)
+            .where(shift_entries.c.id > last_id)
+            .order_by(shift_entries.c.id)
+            .limit(BACKFILL_CHUNK)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            shift_entries.update().where(shift_entries.c.id == sa.bindparam('_id')),
+            [{'_id': row.id, **_totals(row.input_materials, row.output_products)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('shift_entries', 'total_input_cost')
+    op.drop_column('shift_entries', 'total_input_amount')
+    op.drop_column('shift_entries', 'total_output')
@@ -0,0 +1,30 @@
+"""ai analysis cache key
+
+Revision ID: a10d177e6031
+Revises: 81768698366d
+Create Date: 2026-10-17 12:31:08.660143
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a10d177e6031'
+down_revision: Union[str, Sequence[str], None] = '81768698366d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ai_analysis', sa.Column('cache_key', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_ai_analysis_cache_key'), 'ai_analysis', ['cache_key'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_ai_analysis_cache_key'), table_name='ai_analysis')
+    op.drop_column('ai_analysis', 'cache_key')
@@ -0,0 +1,50 @@
+"""shift entry jsonb
+
+Revision ID: ad245ad754a0
+Revises: 64d2d4a18947
+Create Date: 2026-10-17 16:02:55.730418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ad245ad754a0'
+down_revision: Union[str, Sequence[str], None] = '64d2d4a18947'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = ('input_materials', 'output_products')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # JSON -> JSONB only matters (and only exists) on Postgres
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for column in COLUMNS:
+        op.alter_column('shift_entries', column,
+                        existing_type=postgresql.JSON(astext_type=sa.Text()),
+                        type_=postgresql.JSONB(astext_type=sa.Text()),
+                        existing_nullable=True,
+                        postgresql_using=f'{column}::jsonb')
+        op.create_index(f'ix_shift_entries_{column}_gin', 'shift_entries', [column], unique=False,
+                        postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for column in reversed(COLUMNS):
+        op.drop_index(f'ix_shift_entries_{column}_gin', table_name='shift_entries')
+        op.alter_column('shift_entries', column,
+                        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+                        type_=postgresql.JSON(astext_type=sa.Text()),
+                        existing_nullable=True,
+                        postgresql_using=f'{column}::json')
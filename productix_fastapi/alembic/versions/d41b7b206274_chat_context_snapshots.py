@@ -0,0 +1,90 @@
+"""chat context snapshots
+
+Revision ID: d41b7b206274
+Revises: a10d177e6031
+Create Date: 2026-10-17 13:52:19.317540
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41b7b206274'
+down_revision: Union[str, Sequence[str], None] = 'a10d177e6031'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COMPACT_CHUNK = 500
+
+chatbot_history = sa.table(
+    'chatbot_history',
+    sa.column('id', sa.Integer()),
+    sa.column('records', sa.JSON()),
+)
+
+
+def _record_ids(records):
+    """Old rows stored full serialized rows; keep only their ids."""
+    if not isinstance(records, dict):
+        return records
+    compact = {}
+    for old_key, new_key in (('products', 'products'), ('batches', 'batches'), ('shift_entries', 'shifts'), ('shifts', 'shifts')):
+        rows = records.get(old_key)
+        if rows:
+            compact[new_key] = [r.get('id') if isinstance(r, dict) else r for r in rows]
+    return compact
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('chat_context_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.Integer(), nullable=False),
+    sa.Column('context_hash', sa.String(length=64), nullable=False),
+    sa.Column('context', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('organization_id', 'context_hash', name='uq_chat_context_org_hash')
+    )
+    op.create_index(op.f('ix_chat_context_snapshots_id'), 'chat_context_snapshots', ['id'], unique=False)
+    op.add_column('chatbot_history', sa.Column('context_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_chatbot_history_context_hash'), 'chatbot_history', ['context_hash'], unique=False)
+
+    # Shrink existing history rows to record ids, in keyset chunks
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(chatbot_history.c.id, chatbot_history.c.records)
+            .where(chatbot_history.c.id > last_id)
+            .order_by(chatbot_history.c.id)
+            .limit(COMPACT_CHUNK)
+        ).all()
+        if not rows:
+            break
+        updates = [
+            {'row_id': row_id, 'records': _record_ids(records)}
+            for row_id, records in rows
+            if isinstance(records, dict) and records
+        ]
+        if updates:
+            conn.execute(
+                chatbot_history.update()
+                .where(chatbot_history.c.id == sa.bindparam('row_id'))
+                .values(records=sa.bindparam('records')),
+                updates
+            )
+        last_id = rows[-1][0]
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_chatbot_history_context_hash'), table_name='chatbot_history')
+    op.drop_column('chatbot_history', 'context_hash')
+    op.drop_index(op.f('ix_chat_context_snapshots_id'), table_name='chat_context_snapshots')
+    op.drop_table('chat_context_snapshots')
@@ -1,7 +1,7 @@
 """Initial migration for ShiftEntry
 
 Revision ID: f7e9f7cad3e5
-Revises: 
+Revises: 2a9d4c1e8b70
 Create Date: 2025-10-04 19:54:36.312436
 
 """
@@ -13,7 +13,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision: str = 'f7e9f7cad3e5'
-down_revision: Union[str, Sequence[str], None] = None
+down_revision: Union[str, Sequence[str], None] = '2a9d4c1e8b70'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
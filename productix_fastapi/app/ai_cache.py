@@ -0,0 +1,147 @@
+# app/ai_cache.py
+"""
+Content-addressed cache for AI analyses.
+
+Keys are a sha256 over the canonical JSON of the prompt data plus the
+model name (and organization), so identical requests share one answer.
+
+- memory tier: TTL + LRU per worker process (app.cache.TTLCache),
+  checked first; persisted analyses are kept there in response shape
+- persistent tier: rows of the existing `ai_analysis` table, matched on
+  organization_id + cache_key and younger than the TTL. Rows past the TTL
+  have their cache_key cleared (at most once per AI_CACHE_PRUNE_INTERVAL);
+  the rows themselves stay, they are the organization's analysis history
+
+Only successful results are cached; errors are always retried.
+
+Environment:
+    AI_CACHE_TTL      seconds an analysis stays valid (default 3600)
+    AI_CACHE_SIZE     max entries in the memory tier (default 1024)
+    AI_CACHE_PERSIST  "0" disables the ai_analysis lookup (default "1")
+    AI_CACHE_PRUNE_INTERVAL  seconds between cache_key clean-ups (default 3600)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from . import llm, models
+from .cache import TTLCache
+
+AI_CACHE_TTL = int(os.getenv("AI_CACHE_TTL", "3600"))
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "1024"))
+AI_CACHE_PERSIST = os.getenv("AI_CACHE_PERSIST", "1") != "0"
+AI_CACHE_PRUNE_INTERVAL = int(os.getenv("AI_CACHE_PRUNE_INTERVAL", "3600"))
+
+_memory = TTLCache(maxsize=AI_CACHE_SIZE, ttl=AI_CACHE_TTL)
+_prune_lock = threading.Lock()
+_last_prune: Optional[float] = None
+
+# ai_analysis columns returned for a persisted analysis (AIAnalysisResponse)
+ROW_FIELDS = ("id", "organization_id", "user_id", "request_data", "efficiency_score",
+              "ai_prediction", "top_inefficiencies", "ai_prescriptions", "created_at")
+
+
+def content_key(kind: str, data, organization_id: Optional[int] = None, model: Optional[str] = None) -> str:
+    canonical = json.dumps(
+        {"kind": kind, "org": organization_id, "model": model or llm.LLM_MODEL, "data": data},
+        sort_keys=True, separators=(",", ":"), default=str,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def get(key: str) -> Optional[dict]:
+    value = _memory.get(key)
+    return dict(value) if value is not None else None
+
+
+def put(key: str, value: dict, ttl: Optional[float] = None) -> None:
+    if "error" not in value:
+        _memory.set(key, dict(value), ttl)
+
+
+def find_persisted(db: Session, organization_id: int, key: str) -> Optional[models.AIAnalysis]:
+    """Latest ai_analysis row of this organization with the same key, if still fresh."""
+    if not AI_CACHE_PERSIST:
+        return None
+    return db.query(models.AIAnalysis).filter(
+        models.AIAnalysis.organization_id == organization_id,
+        models.AIAnalysis.cache_key == key,
+        models.AIAnalysis.created_at >= datetime.utcnow() - timedelta(seconds=AI_CACHE_TTL),
+    ).order_by(models.AIAnalysis.id.desc()).first()
+
+
+def _row_value(row: models.AIAnalysis) -> dict:
+    return {field: getattr(row, field) for field in ROW_FIELDS}
+
+
+def lookup(db: Session, organization_id: int, key: str) -> Optional[dict]:
+    """
+    Cached analysis for a key: the memory tier first, then the persisted
+    rows. A value with an "id" is a persisted row (response shape); one
+    without is an analysis not stored yet. None on a miss.
+    """
+    value = get(key)
+    if value is not None and "id" in value:
+        return value
+    row = find_persisted(db, organization_id, key)
+    if row is None:
+        return value
+    value = _row_value(row)
+    remaining = AI_CACHE_TTL - (datetime.utcnow() - row.created_at).total_seconds()
+    put(key, value, ttl=max(remaining, 0))
+    return value
+
+
+def persist(db: Session, organization_id: int, user_id: int, request_data: dict,
+            analysis: dict, key: str) -> dict:
+    """Stores a fresh analysis as an ai_analysis row and returns it in response shape."""
+    row = models.AIAnalysis(
+        organization_id=organization_id,
+        user_id=user_id,
+        request_data=request_data,
+        efficiency_score=analysis.get("efficiency_score"),
+        ai_prediction=analysis.get("ai_prediction"),
+        top_inefficiencies=analysis.get("top_inefficiencies"),
+        ai_prescriptions=analysis.get("ai_prescriptions"),
+        cache_key=key,
+    )
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+    value = _row_value(row)
+    put(key, value)
+    maybe_prune(db)
+    return value
+
+
+def prune_persisted(db: Session) -> int:
+    """Clears cache_key on ai_analysis rows older than the TTL; returns how many."""
+    cutoff = datetime.utcnow() - timedelta(seconds=AI_CACHE_TTL)
+    count = db.query(models.AIAnalysis).filter(
+        models.AIAnalysis.cache_key.isnot(None),
+        models.AIAnalysis.created_at < cutoff,
+    ).update({models.AIAnalysis.cache_key: None}, synchronize_session=False)
+    db.commit()
+    return count
+
+
+def maybe_prune(db: Session) -> None:
+    """Runs prune_persisted at most once per AI_CACHE_PRUNE_INTERVAL per process."""
+    global _last_prune
+    with _prune_lock:
+        if _last_prune is not None and time.monotonic() - _last_prune < AI_CACHE_PRUNE_INTERVAL:
+            return
+        _last_prune = time.monotonic()
+    try:
+        pruned = prune_persisted(db)
+        if pruned:
+            print(f"🧹 Cleared {pruned} expired AI cache keys")
+    except Exception as e:
+        db.rollback()
+        print("⚠️ AI cache prune failed:", e)
@@ -0,0 +1,208 @@
+# app/analytics_queries.py
+"""
+Set-based analytics over shift totals for chatbot questions.
+
+Every question compiles to a single grouped SQL query over the
+materialized ShiftEntry totals (see app/metrics.py):
+
+    metric   output | input | input_cost | productivity (output / input)
+    group    batch | product | shift | day
+    op       top (ORDER BY ... DESC LIMIT n) | bottom (ASC) | average
+
+`parse_question` maps free text ("top 3 products by input cost",
+"which day had the lowest productivity") to such a spec. A named product
+or batch ("most productive batch of product Widget", "top 3 days of batch
+B-7") becomes a filter, resolved with app/entity_lookup.py before the
+query runs. Questions about a single named entity ("average cost of batch
+B-7") are not analytic and parse to None, so they reach the entity lookup.
+"""
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import entity_lookup
+from .models import Batch, Product, ShiftEntry
+
+METRIC_LABELS = {
+    "output": "total output",
+    "input": "total input amount",
+    "input_cost": "total input cost",
+    "productivity": "productivity (output / input)",
+}
+GROUP_LABELS = {"batch": "Batch", "product": "Product", "shift": "Shift", "day": "Day"}
+GROUP_PLURALS = {"batch": "batches", "product": "products", "shift": "shifts", "day": "days"}
+
+_TOP_WORDS = ("highest", "max", "maximum", "most", "top", "best", "largest", "biggest")
+_BOTTOM_WORDS = ("lowest", "min", "minimum", "least", "worst", "smallest", "fewest")
+_AVG_WORDS = ("average", "avg", "mean")
+
+# "batch-001", "batch B-7", "batch #89", "batch no 12": batch numbers contain a digit
+_BATCH_NAME = re.compile(r"\b(batch-\d[\w\-]*)|\bbatch\b[\s#:]*(?:(?:number|no\.?)[\s#:]*)?([\w\-]*\d[\w\-]*)")
+# "product Widget A" up to the next connective or the end of the sentence
+_PRODUCT_NAME = re.compile(
+    r"\bproduct\s+(?!(?:by|with|has|had|is|was|were|are|in|of|for|per|and|or)\b)"
+    r"([\w\-]+(?:\s+[\w\-]+)*?)(?=\s+(?:by|in|on|for|during|per|with|and|had|has|was|is)\b|[?.!,]|$)"
+)
+# Groupings finer than the named entity; anything else is about the entity itself
+_SCOPED_GROUPS = {"product": ("batch", "shift", "day"), "batch": ("shift", "day")}
+
+
+def _metric_expr(metric: str):
+    if metric == "output":
+        return func.sum(ShiftEntry.total_output)
+    if metric == "input":
+        return func.sum(ShiftEntry.total_input_amount)
+    if metric == "input_cost":
+        return func.sum(ShiftEntry.total_input_cost)
+    if metric == "productivity":
+        return func.sum(ShiftEntry.total_output) / func.nullif(func.sum(ShiftEntry.total_input_amount), 0)
+    raise ValueError(f"Unknown metric: {metric}")
+
+
+def _grouped(db: Session, organization_id: int, metric: str, group_by: str,
+             product_id: Optional[int] = None, batch_id: Optional[int] = None):
+    """Per-group metric query: (label, value) rows, not yet ordered, optionally within one product or batch."""
+    value = _metric_expr(metric).label("value")
+    if group_by == "batch":
+        query = db.query(Batch.batch_number.label("label"), value) \
+            .join(ShiftEntry, ShiftEntry.batch_id == Batch.id) \
+            .group_by(Batch.id, Batch.batch_number)
+    elif group_by == "product":
+        query = db.query(Product.name.label("label"), value) \
+            .join(Batch, Batch.product_id == Product.id) \
+            .join(ShiftEntry, ShiftEntry.batch_id == Batch.id) \
+            .group_by(Product.id, Product.name)
+    elif group_by == "shift":
+        query = db.query(ShiftEntry.shift_no.label("label"), value).group_by(ShiftEntry.shift_no)
+    elif group_by == "day":
+        query = db.query(ShiftEntry.date.label("label"), value).group_by(ShiftEntry.date)
+    else:
+        raise ValueError(f"Unknown grouping: {group_by}")
+
+    query = query.filter(ShiftEntry.organization_id == organization_id)
+    if product_id is not None:
+        query = query.filter(ShiftEntry.batch_id.in_(select(Batch.id).where(Batch.product_id == product_id)))
+    if batch_id is not None:
+        query = query.filter(ShiftEntry.batch_id == batch_id)
+    if metric == "productivity":
+        query = query.having(func.sum(ShiftEntry.total_input_amount) > 0)
+    return query, value
+
+
+def ranked(db: Session, organization_id: int, metric: str, group_by: str,
+           descending: bool = True, limit: int = 1, **scope) -> List[Tuple[str, float]]:
+    """Top (or bottom) `limit` groups by metric, in one ORDER BY ... LIMIT query."""
+    query, value = _grouped(db, organization_id, metric, group_by, **scope)
+    query = query.order_by(value.desc() if descending else value.asc()).limit(limit)
+    return [(str(label), float(v or 0)) for label, v in query]
+
+
+def average(db: Session, organization_id: int, metric: str, group_by: str, **scope) -> Optional[float]:
+    """Average of the per-group metric, in one query over a grouped subquery."""
+    grouped = _grouped(db, organization_id, metric, group_by, **scope)[0].subquery()
+    result = db.query(func.avg(grouped.c.value)).scalar()
+    return float(result) if result is not None else None
+
+
+def parse_question(query: str) -> Optional[dict]:
+    """
+    Extracts {op, metric, group_by, limit, product, batch} from a question,
+    or None if it is not analytic. product / batch are the names of an
+    entity the question is restricted to.
+    """
+    q = query.lower()
+
+    # Named entities become filters; their names must not count as keywords
+    scope = {}
+    for kind, pattern in (("batch", _BATCH_NAME), ("product", _PRODUCT_NAME)):
+        m = pattern.search(q)
+        if m:
+            scope[kind] = next(g for g in m.groups() if g).strip()
+            q = q[:m.start()] + " " + q[m.end():]
+    words = set(re.findall(r"[a-z]+", q))
+
+    if words & set(_AVG_WORDS):
+        op = "average"
+    elif words & set(_TOP_WORDS):
+        op = "top"
+    elif words & set(_BOTTOM_WORDS):
+        op = "bottom"
+    else:
+        return None
+
+    if "cost" in q or "spend" in q or "expens" in q:
+        metric = "input_cost"
+    elif "productiv" in q or "efficien" in q or "ratio" in q:
+        metric = "productivity"
+    elif "input" in q or "material" in q or "consum" in q:
+        metric = "input"
+    elif "output" in q or "produc" in q or "yield" in q:
+        metric = "output"
+    else:
+        return None
+
+    if re.search(r"\bproducts?\b", q):
+        group_by = "product"
+    elif re.search(r"\bshifts?\b", q):
+        group_by = "shift"
+    elif re.search(r"\b(day|days|date|daily)\b", q):
+        group_by = "day"
+    else:
+        group_by = "batch"
+
+    if any(group_by not in _SCOPED_GROUPS[kind] for kind in scope):
+        return None  # about the named product / batch itself, not a ranking within it
+
+    m = re.search(r"\b(?:top|bottom|best|worst)\s+(\d+)\b", q)
+    limit = min(int(m.group(1)), 50) if m else 1
+    return {"op": op, "metric": metric, "group_by": group_by, "limit": limit,
+            "product": scope.get("product"), "batch": scope.get("batch")}
+
+
+def _resolve_scope(db: Session, organization_id: int, spec: dict):
+    """Filter ids and a label for the named product / batch; (None, message) if one is not found."""
+    scope, labels = {}, []
+    if spec.get("product"):
+        matches = entity_lookup.find_products(db, organization_id, spec["product"], Product.id, Product.name, limit=1)
+        if not matches:
+            return None, f"No product matching '{spec['product']}' found."
+        scope["product_id"] = matches[0].id
+        labels.append(f"product {matches[0].name}")
+    if spec.get("batch"):
+        matches = entity_lookup.find_batches(db, organization_id, spec["batch"], Batch.id, Batch.batch_number, limit=1)
+        if not matches:
+            return None, f"No batch matching '{spec['batch']}' found."
+        scope["batch_id"] = matches[0].id
+        labels.append(f"batch {matches[0].batch_number}")
+    return scope, (f" in {' / '.join(labels)}" if labels else "")
+
+
+def answer_question(db: Session, organization_id: int, spec: dict) -> str:
+    """Runs a parsed question and formats the answer."""
+    metric, group_by = spec["metric"], spec["group_by"]
+    metric_label = METRIC_LABELS[metric]
+    group_label = GROUP_LABELS[group_by]
+
+    scope, within = _resolve_scope(db, organization_id, spec)
+    if scope is None:
+        return within
+
+    if spec["op"] == "average":
+        value = average(db, organization_id, metric, group_by, **scope)
+        if value is None:
+            return f"No shift data available to compute the average {metric_label} per {group_by}{within}."
+        return f"Average {metric_label} per {group_by}{within}: {value:.2f}"
+
+    descending = spec["op"] == "top"
+    rows = ranked(db, organization_id, metric, group_by, descending=descending, limit=spec["limit"], **scope)
+    if not rows:
+        return f"No shift data available to rank {GROUP_PLURALS[group_by]}{within} by {metric_label}."
+    direction = "highest" if descending else "lowest"
+    if len(rows) == 1:
+        label, value = rows[0]
+        return f"{group_label}{within} with {direction} {metric_label}: {label} — {value:.2f}"
+    lines = [f"{GROUP_PLURALS[group_by].capitalize()}{within} with {direction} {metric_label}:"]
+    lines += [f"{i}. {label} — {value:.2f}" for i, (label, value) in enumerate(rows, 1)]
+    return "\n".join(lines)
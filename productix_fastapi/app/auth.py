@@ -1,3 +1,6 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -10,12 +13,26 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt costs ~250ms of CPU per call (and releases the GIL), so async code runs it
+# on its own small pool: a login burst queues here instead of blocking the event
+# loop or taking every threadpool worker from other requests.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
 def verify_password(plain, hashed):
     return pwd_context.verify(plain, hashed)
 
 def hash_password(password: str):
     return pwd_context.hash(password)
 
+async def verify_password_async(plain, hashed) -> bool:
+    """verify_password on the bounded hashing pool."""
+    return await asyncio.get_running_loop().run_in_executor(_hash_executor, verify_password, plain, hashed)
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the bounded hashing pool."""
+    return await asyncio.get_running_loop().run_in_executor(_hash_executor, hash_password, password)
+
 def create_access_token(data: dict, expires_delta: int = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -0,0 +1,224 @@
+# app/context_builder.py
+"""
+Token-budgeted prompt context for the RAG chatbot.
+
+Candidate products, batches and shifts of an organization are fetched as
+plain column projections (bounded by CONTEXT_CANDIDATE_LIMIT), ranked by
+how many query terms they mention (ties keep the most recent first), and
+written as compact pipe-separated tables until the token budget is used:
+
+    ## shifts
+    date|batch|product|shift|inputs|outputs|notes
+    2025-03-01|BATCH-001|Widget|Morning|steel=100@5;plastic=50@3|goods=130|
+
+Tokens are estimated as characters / 4.
+
+Environment:
+    CONTEXT_TOKEN_BUDGET     max prompt context tokens (default 6000)
+    CONTEXT_CANDIDATE_LIMIT  max shifts considered per query (default 2000)
+"""
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import models
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+CONTEXT_CANDIDATE_LIMIT = int(os.getenv("CONTEXT_CANDIDATE_LIMIT", "2000"))
+CHARS_PER_TOKEN = 4
+
+# Share of the budget each section may use; unused budget rolls over to the next one
+SECTION_SHARES = (("products", 0.15), ("batches", 0.25), ("shifts", 1.0))
+
+_STOPWORDS = {
+    "the", "and", "for", "with", "what", "which", "show", "me", "of", "in", "on", "a", "an",
+    "is", "are", "was", "were", "my", "our", "how", "many", "much", "did", "do", "does",
+    "to", "from", "by", "all", "any", "tell", "about", "give", "list", "please",
+}
+
+
+def query_terms(query: str) -> List[str]:
+    return [t for t in re.findall(r"[a-z0-9][a-z0-9_\-\.]*", query.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if hasattr(value, "value"):  # enums
+        value = value.value
+    return str(value).replace("|", "/").replace("\n", " ")
+
+
+def _compact_materials(materials) -> str:
+    """{"steel": {"amount": 100, "unit_price": 5}} -> "steel=100@5"."""
+    if not isinstance(materials, dict):
+        return ""
+    parts = []
+    for name, value in materials.items():
+        if isinstance(value, dict):
+            amount = value.get("amount", "")
+            price = value.get("unit_price")
+            parts.append(f"{name}={amount}@{price}" if price not in (None, "") else f"{name}={amount}")
+        else:
+            parts.append(f"{name}={value}")
+    return ";".join(parts)
+
+
+def _rank(rows: Sequence[Tuple[int, List[str]]], terms: List[str]) -> List[Tuple[int, List[str]]]:
+    """Orders (id, cells) rows by matched query terms; stable, so recency breaks ties."""
+    if not terms:
+        return list(rows)
+
+    def score(row):
+        text = " ".join(row[1]).lower()
+        return sum(1 for t in terms if t in text)
+
+    return sorted(rows, key=score, reverse=True)
+
+
+def _table(name: str, header: Sequence[str], rows: Iterable[Tuple[int, List[str]]], budget_chars: int):
+    """Writes rows until budget_chars is reached; returns (text, ids, chars used)."""
+    lines = [f"## {name}", "|".join(header)]
+    used = sum(len(l) + 1 for l in lines)
+    ids = []
+    omitted = 0
+    for row_id, cells in rows:
+        line = "|".join(cells)
+        if used + len(line) + 1 > budget_chars:
+            omitted += 1
+            continue
+        lines.append(line)
+        used += len(line) + 1
+        ids.append(row_id)
+    if not ids:
+        return "", [], 0
+    if omitted:
+        lines.append(f"({omitted} more {name} omitted)")
+    text = "\n".join(lines)
+    return text, ids, len(text) + 1
+
+
+def build_context(
+    query: str,
+    products: Sequence[Tuple[int, List[str]]],
+    batches: Sequence[Tuple[int, List[str]]],
+    shifts: Sequence[Tuple[int, List[str]]],
+    budget_tokens: Optional[int] = None,
+    ranked: bool = False,
+) -> Tuple[str, Dict[str, List[int]]]:
+    """
+    Ranks and packs pre-formatted rows into at most `budget_tokens` tokens.
+
+    Each row is (id, cells) with cells matching the section header; pass
+    ranked=True when the rows are already ordered best first.
+    Returns the context text and the ids included per section.
+    """
+    budget_chars = (budget_tokens or CONTEXT_TOKEN_BUDGET) * CHARS_PER_TOKEN
+    terms = query_terms(query)
+    sections = {
+        "products": (("product", "description", "input_fields", "output_fields"), products),
+        "batches": (("batch", "product", "start", "end", "status"), batches),
+        "shifts": (("date", "batch", "product", "shift", "inputs", "outputs", "notes"), shifts),
+    }
+
+    parts = []
+    included = {}
+    remaining = budget_chars
+    for name, share in SECTION_SHARES:
+        header, rows = sections[name]
+        allowance = remaining if share >= 1 else int(budget_chars * share)
+        text, ids, used = _table(name, header, rows if ranked else _rank(rows, terms), min(allowance, remaining))
+        if text:
+            parts.append(text)
+        included[name] = ids
+        remaining -= used
+
+    return "\n\n".join(parts) or "No records available.", included
+
+
+def iter_product_rows(db: Session, organization_id: int, ids: Optional[Iterable[int]] = None,
+                      limit: Optional[int] = CONTEXT_CANDIDATE_LIMIT) -> Iterator[Tuple[int, List[str]]]:
+    query = db.query(
+        models.Product.id, models.Product.name, models.Product.description,
+        models.Product.input_fields, models.Product.output_fields,
+    ).filter(models.Product.organization_id == organization_id)
+    if ids is not None:
+        query = query.filter(models.Product.id.in_(list(ids)))
+    query = query.order_by(models.Product.id.desc())
+    if limit:
+        query = query.limit(limit)
+    for p in query.yield_per(1000):
+        yield p.id, [_cell(p.name), _cell(p.description),
+                     ",".join(map(str, p.input_fields or [])), ",".join(map(str, p.output_fields or []))]
+
+
+def iter_batch_rows(db: Session, organization_id: int, ids: Optional[Iterable[int]] = None,
+                    limit: Optional[int] = CONTEXT_CANDIDATE_LIMIT) -> Iterator[Tuple[int, List[str]]]:
+    query = db.query(
+        models.Batch.id, models.Batch.batch_number, models.Product.name.label("product_name"),
+        models.Batch.start_date, models.Batch.end_date, models.Batch.status,
+    ).join(models.Product, models.Product.id == models.Batch.product_id) \
+        .filter(models.Batch.organization_id == organization_id)
+    if ids is not None:
+        query = query.filter(models.Batch.id.in_(list(ids)))
+    query = query.order_by(models.Batch.start_date.desc(), models.Batch.id.desc())
+    if limit:
+        query = query.limit(limit)
+    for b in query.yield_per(1000):
+        yield b.id, [_cell(b.batch_number), _cell(b.product_name), _cell(b.start_date), _cell(b.end_date), _cell(b.status)]
+
+
+def iter_shift_rows(db: Session, organization_id: int, ids: Optional[Iterable[int]] = None,
+                    limit: Optional[int] = CONTEXT_CANDIDATE_LIMIT) -> Iterator[Tuple[int, List[str]]]:
+    query = db.query(
+        models.ShiftEntry.id, models.ShiftEntry.date, models.ShiftEntry.shift_no,
+        models.ShiftEntry.input_materials, models.ShiftEntry.output_products, models.ShiftEntry.admin_notes,
+        models.Batch.batch_number, models.Product.name.label("product_name"),
+    ).join(models.Batch, models.Batch.id == models.ShiftEntry.batch_id) \
+        .join(models.Product, models.Product.id == models.Batch.product_id) \
+        .filter(models.ShiftEntry.organization_id == organization_id)
+    if ids is not None:
+        query = query.filter(models.ShiftEntry.id.in_(list(ids)))
+    query = query.order_by(models.ShiftEntry.date.desc(), models.ShiftEntry.id.desc())
+    if limit:
+        query = query.limit(limit)
+    for s in query.yield_per(1000):
+        yield s.id, [_cell(s.date), _cell(s.batch_number), _cell(s.product_name), _cell(s.shift_no),
+                     _cell(_compact_materials(s.input_materials)), _cell(_compact_materials(s.output_products)),
+                     _cell(s.admin_notes)]
+
+
+def _in_order(rows: Iterable[Tuple[int, List[str]]], ids: List[int]) -> List[Tuple[int, List[str]]]:
+    by_id = dict(rows)
+    return [(i, by_id[i]) for i in ids if i in by_id]
+
+
+def load_org_context(
+    db: Session,
+    organization_id: int,
+    query: str,
+    budget_tokens: Optional[int] = None,
+    record_ids: Optional[Dict[str, List[int]]] = None,
+) -> Tuple[str, Dict[str, List[int]]]:
+    """
+    Builds the context for an organization.
+
+    With `record_ids` (e.g. top-k hits from app/vector_index.py, best first)
+    only those rows are loaded and kept in that order; otherwise the most
+    recent candidates are fetched and ranked by query terms.
+    """
+    if record_ids is not None:
+        products = _in_order(iter_product_rows(db, organization_id, record_ids.get("products", []), None), record_ids.get("products", []))
+        batches = _in_order(iter_batch_rows(db, organization_id, record_ids.get("batches", []), None), record_ids.get("batches", []))
+        shifts = _in_order(iter_shift_rows(db, organization_id, record_ids.get("shifts", []), None), record_ids.get("shifts", []))
+        return build_context(query, products, batches, shifts, budget_tokens, ranked=True)
+
+    return build_context(
+        query,
+        list(iter_product_rows(db, organization_id)),
+        list(iter_batch_rows(db, organization_id)),
+        list(iter_shift_rows(db, organization_id)),
+        budget_tokens,
+    )
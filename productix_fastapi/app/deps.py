@@ -1,23 +1,71 @@
+import os
+from collections import namedtuple
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from .cache import TTLCache
 from .database import get_db
 from . import models, auth
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> models.User:
+# Authenticated principals, keyed by token, so most requests authenticate
+# without a query. Each worker process has its own cache: invalidation below
+# is local, and PRINCIPAL_CACHE_TTL bounds how stale other workers can be.
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+
+# What handlers read from current_user; endpoints that need the full row
+# (e.g. GET /users/me) load it by id.
+Principal = namedtuple("Principal", ["id", "organization_id", "role", "org_status"])
+
+_principals = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+
+def _load_principal(db: Session, user_id: int):
+    row = (
+        db.query(models.User.id, models.User.organization_id, models.User.role, models.Organization.status)
+        .outerjoin(models.Organization, models.User.organization_id == models.Organization.id)
+        .filter(models.User.id == user_id)
+        .first()
+    )
+    return Principal(*row) if row else None
+
+
+def invalidate_user(user_id: int) -> int:
+    """Drops cached principals of a user (call after deleting it or changing its role)."""
+    return _principals.pop_where(lambda _, principal: principal.id == user_id)
+
+
+def invalidate_organization(org_id: int) -> int:
+    """Drops cached principals of an organization (call after disabling, enabling or deleting it)."""
+    return _principals.pop_where(lambda _, principal: principal.organization_id == org_id)
+
+
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> Principal:
+    # Signature and expiry are checked on every request, cached or not
     token_data = auth.decode_token(token)
     if not token_data:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    
-    user = db.query(models.User).filter(models.User.id == token_data.id).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-    return user
+
+    principal = _principals.get(token)
+    if principal is None:
+        principal = _load_principal(db, token_data.id)
+        if not principal:
+            raise HTTPException(status_code=401, detail="User not found")
+        _principals.set(token, principal)
+
+    # Same rule as login: tokens of a disabled organization stop working
+    if principal.role != models.UserRole.system_admin and principal.org_status != "active":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Package expired. Please renew your subscription.",
+        )
+    return principal
 
 def require_role(required_role: str):
-    def role_checker(current_user: models.User = Depends(get_current_user)):
+    def role_checker(current_user: Principal = Depends(get_current_user)):
         if current_user.role.value != required_role and current_user.role.value != "system_admin":
             raise HTTPException(status_code=403, detail="Insufficient permissions")
         return current_user
@@ -0,0 +1,80 @@
+# app/entity_lookup.py
+"""
+Name lookups for chatbot entity resolution (batches by number, products by name).
+
+On Postgres with pg_trgm the search is fuzzy: substring matches (ILIKE)
+plus trigram similarity matches, both served by the GIN trigram indexes
+on batches.batch_number / products.name, best match first. Without
+pg_trgm Postgres falls back to ILIKE substring matching. Other databases
+(SQLite in development) use a case-insensitive prefix search on the
+(organization_id, name) composite indexes, falling back to a substring
+search when no prefix matches.
+"""
+import threading
+from typing import Dict, List
+
+from sqlalchemy import func, literal, or_, text
+from sqlalchemy.orm import Session
+
+from .models import Batch, Product
+
+LOOKUP_LIMIT = 50
+
+_trgm_by_engine: Dict[str, bool] = {}
+_trgm_lock = threading.Lock()
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _has_pg_trgm(db: Session) -> bool:
+    """Whether pg_trgm is installed; checked once per database."""
+    bind = db.get_bind()
+    key = str(bind.engine.url)
+    with _trgm_lock:
+        if key in _trgm_by_engine:
+            return _trgm_by_engine[key]
+    installed = db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+    with _trgm_lock:
+        _trgm_by_engine[key] = installed
+    return installed
+
+
+def _lookup(db: Session, query, column, identifier: str, limit: int) -> List:
+    identifier = identifier.strip()
+    if not identifier:
+        return []
+    escaped = _escape_like(identifier)
+
+    substring = column.ilike(f"%{escaped}%", escape="\\")
+    exact_first = (func.lower(column) == identifier.lower()).desc()
+
+    if db.get_bind().dialect.name == "postgresql":
+        if not _has_pg_trgm(db):
+            return query.filter(substring).order_by(exact_first, column).limit(limit).all()
+        return query.filter(or_(
+            substring,
+            column.op("%")(identifier),  # similarity above pg_trgm.similarity_threshold
+        )).order_by(
+            exact_first,
+            func.similarity(column, literal(identifier)).desc(),
+            column,
+        ).limit(limit).all()
+
+    rows = query.filter(column.ilike(f"{escaped}%", escape="\\")).order_by(column).limit(limit).all()
+    if rows:
+        return rows
+    return query.filter(substring).order_by(column).limit(limit).all()
+
+
+def find_batches(db: Session, organization_id: int, identifier: str, *columns, limit: int = LOOKUP_LIMIT) -> List:
+    """Batches of an organization whose number matches `identifier`, best match first."""
+    query = db.query(*(columns or (Batch,))).filter(Batch.organization_id == organization_id)
+    return _lookup(db, query, Batch.batch_number, identifier, limit)
+
+
+def find_products(db: Session, organization_id: int, identifier: str, *columns, limit: int = LOOKUP_LIMIT) -> List:
+    """Products of an organization whose name matches `identifier`, best match first."""
+    query = db.query(*(columns or (Product,))).filter(Product.organization_id == organization_id)
+    return _lookup(db, query, Product.name, identifier, limit)
@@ -0,0 +1,309 @@
+# app/importer.py
+"""
+Set-based bulk import of shift entries.
+
+Each chunk of the ShiftEntries sheet is prepared column-wise (dates parsed
+in one vectorized call, JSON cells decoded once per distinct value, batch
+numbers mapped to ids through a dict), existing (batch_id, date, shift_no)
+keys are resolved with one query, then new rows are written with a single
+executemany INSERT and changed rows with a single executemany UPDATE
+by primary key. The line items of written rows (app/line_items.py) are
+replaced in the same chunk transaction.
+
+(batch_id, date, shift_no) is unique, and new rows are inserted with ON
+CONFLICT DO NOTHING: a row another import inserted after the lookup is
+skipped by the INSERT and then updated like any existing row, so
+concurrent imports of the same workbook cannot duplicate shifts.
+
+Every imported row stores a hash of its content (import_hash), so rows
+whose content did not change since the last import are skipped entirely.
+"""
+import hashlib
+import json
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Union
+
+import pandas as pd
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from . import models
+from .line_items import line_item_rows, write_line_items
+from .metrics import shift_totals
+
+try:  # optional, noticeably faster on large sheets
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+IMPORT_CHUNK_SIZE = 1000
+
+
+def parse_json_cell(value) -> dict:
+    """Decodes a JSON cell from a sheet; empty or invalid cells become {}."""
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str) and value.strip():
+        try:
+            parsed = _json_loads(value)
+        except ValueError:  # json and orjson decode errors both subclass it
+            return {}
+        return parsed if isinstance(parsed, dict) else {}
+    return {}
+
+
+def decode_json_column(values: Iterable) -> List[dict]:
+    """Decodes a column of JSON cells, parsing each distinct string only once."""
+    decoded = {}
+    out = []
+    for value in values:
+        if isinstance(value, str):
+            parsed = decoded.get(value)
+            if parsed is None:
+                parsed = decoded[value] = parse_json_cell(value)
+            out.append(parsed)
+        else:
+            out.append(value if isinstance(value, dict) else {})
+    return out
+
+
+def coerce_date(value) -> Optional[date]:
+    """Accepts date/datetime (incl. pandas Timestamp) or ISO strings."""
+    if isinstance(value, datetime):
+        return None if value != value else value.date()  # NaT != NaT
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str) and value.strip():
+        try:
+            return datetime.fromisoformat(value.strip()).date()
+        except ValueError:
+            return None
+    return None
+
+
+def compute_import_hash(input_materials: dict, output_products: dict, admin_notes: str) -> str:
+    """sha256 over the canonical JSON of a shift row's content (not its key)."""
+    canonical = json.dumps(
+        [input_materials or {}, output_products or {}, admin_notes or ""],
+        sort_keys=True, separators=(",", ":"), default=str,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _frame_chunks(frames: Union[pd.DataFrame, Iterable[pd.DataFrame]], size: int) -> Iterator[pd.DataFrame]:
+    """Splits a DataFrame (or a stream of them) into slices of at most `size` rows."""
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    for frame in frames:
+        for start in range(0, len(frame), size):
+            yield frame.iloc[start:start + size]
+
+
+def _cell_text(value) -> str:
+    # Excel hands numeric cells over as floats: shift 1 must stay "1", not "1.0"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _text_column(frame: pd.DataFrame, column: str) -> pd.Series:
+    if column not in frame:
+        return pd.Series("", index=frame.index)
+    return frame[column].fillna("").map(_cell_text)
+
+
+def prepare_shift_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Normalizes a ShiftEntries chunk column-wise; invalid dates become None."""
+    dates = pd.to_datetime(frame["date"], errors="coerce")
+    return pd.DataFrame({
+        "batch_number": _text_column(frame, "batch_number").str.strip(),
+        "date": dates.dt.date.astype(object).where(dates.notna(), None),
+        "shift_no": _text_column(frame, "shift_no"),
+        "input_materials": decode_json_column(frame["input_materials"]) if "input_materials" in frame else [{}] * len(frame),
+        "output_products": decode_json_column(frame["output_products"]) if "output_products" in frame else [{}] * len(frame),
+        "admin_notes": _text_column(frame, "admin_notes"),
+    }, index=frame.index)
+
+
+def resolve_batch_ids(db: Session, organization_id: int, batch_numbers: Iterable[str]) -> Dict[str, int]:
+    """Maps batch numbers to ids for one organization in a single query."""
+    batch_numbers = {str(n) for n in batch_numbers if n}
+    if not batch_numbers:
+        return {}
+    rows = db.query(models.Batch.batch_number, models.Batch.id).filter(
+        models.Batch.organization_id == organization_id,
+        models.Batch.batch_number.in_(batch_numbers)
+    ).all()
+    return {number: batch_id for number, batch_id in rows}
+
+
+def _existing_shifts(db: Session, keys: Set[tuple]) -> Dict[tuple, tuple]:
+    """Maps existing (batch_id, date, shift_no) keys to (id, import_hash)."""
+    if not keys:
+        return {}
+    batch_ids = {k[0] for k in keys}
+    dates = {k[1] for k in keys}
+    rows = db.query(
+        models.ShiftEntry.id,
+        models.ShiftEntry.batch_id,
+        models.ShiftEntry.date,
+        models.ShiftEntry.shift_no,
+        models.ShiftEntry.import_hash,
+    ).filter(
+        models.ShiftEntry.batch_id.in_(batch_ids),
+        models.ShiftEntry.date.in_(dates),
+    )
+    return {
+        (batch_id, shift_date, shift_no): (shift_id, import_hash)
+        for shift_id, batch_id, shift_date, shift_no, import_hash in rows
+        if (batch_id, shift_date, shift_no) in keys
+    }
+
+
+def _insert_new_shifts(db: Session, rows: List[dict]) -> Dict[tuple, int]:
+    """
+    Inserts shift rows, skipping keys that exist by now (ON CONFLICT DO
+    NOTHING); returns the ids of the inserted rows by (batch_id, date, shift_no).
+    """
+    dialect_insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+    stmt = (
+        dialect_insert(models.ShiftEntry)
+        .on_conflict_do_nothing(index_elements=["batch_id", "date", "shift_no"])
+        .returning(models.ShiftEntry.id, models.ShiftEntry.batch_id, models.ShiftEntry.date, models.ShiftEntry.shift_no)
+    )
+    return {
+        (batch_id, shift_date, shift_no): shift_id
+        for shift_id, batch_id, shift_date, shift_no in db.execute(stmt, rows)
+    }
+
+
+def upsert_shift_entries(
+    db: Session,
+    organization_id: int,
+    frames: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    on_chunk: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Inserts or updates shift entries keyed by (batch_number, date, shift_no).
+
+    `frames` is a ShiftEntries DataFrame, or an iterator of DataFrame chunks,
+    with batch_number, date, shift_no, input_materials, output_products and
+    admin_notes columns. Rows are written in chunks, each committed on its
+    own; later rows win over earlier ones with the same key. Rows whose
+    content hash matches the stored one are not written. `on_chunk` is
+    called after each commit with that chunk's counts.
+    Returns counts plus the ids of the shifts written and of their batches.
+    """
+    created = 0
+    updated = 0
+    unchanged = 0
+    errors = []
+    touched_batch_ids = set()
+    written_shift_ids = []
+    batch_ids = {}
+
+    for chunk in _frame_chunks(frames, chunk_size):
+        prepared = prepare_shift_frame(chunk)
+
+        unknown = set(prepared["batch_number"].unique()) - batch_ids.keys()
+        if unknown:
+            batch_ids.update(dict.fromkeys(unknown))
+            batch_ids.update(resolve_batch_ids(db, organization_id, unknown))
+        prepared["batch_id"] = prepared["batch_number"].map(batch_ids)
+
+        no_batch = prepared["batch_id"].isna()
+        bad_date = ~no_batch & prepared["date"].isna()
+        for shift_no, shift_date in zip(prepared.loc[no_batch, "shift_no"], prepared.loc[no_batch, "date"]):
+            errors.append(f"Batch not found for shift entry: {shift_no} on {shift_date}")
+        for batch_number, raw_date in zip(prepared.loc[bad_date, "batch_number"], chunk.loc[bad_date, "date"]):
+            errors.append(f"Invalid date for shift entry in batch {batch_number}: {raw_date}")
+
+        # Deduplicate on the natural key within the chunk (last row wins)
+        valid = prepared[~no_batch & ~bad_date].drop_duplicates(["batch_id", "date", "shift_no"], keep="last")
+        keyed = {}
+        for batch_id, shift_date, shift_no, input_materials, output_products, admin_notes in zip(
+            valid["batch_id"], valid["date"], valid["shift_no"],
+            valid["input_materials"], valid["output_products"], valid["admin_notes"],
+        ):
+            keyed[(int(batch_id), shift_date, shift_no)] = {
+                "input_materials": input_materials,
+                "output_products": output_products,
+                "admin_notes": admin_notes,
+                "import_hash": compute_import_hash(input_materials, output_products, admin_notes),
+            }
+
+        existing = _existing_shifts(db, set(keyed))
+        new_rows = []
+        changed_rows = []
+        changed_keys = {}
+        for (batch_id, shift_date, shift_no), values in keyed.items():
+            shift_id, stored_hash = existing.get((batch_id, shift_date, shift_no), (None, None))
+            if shift_id is not None and stored_hash == values["import_hash"]:
+                continue
+            values.update(shift_totals(values["input_materials"], values["output_products"]))
+            if shift_id is None:
+                new_rows.append({
+                    "organization_id": organization_id,
+                    "batch_id": batch_id,
+                    "date": shift_date,
+                    "shift_no": shift_no,
+                    **values,
+                })
+            else:
+                changed_rows.append({"id": shift_id, **values})
+                changed_keys[shift_id] = (batch_id, shift_date, shift_no)
+            touched_batch_ids.add(batch_id)
+
+        items = []
+        new_ids = []
+        if new_rows:
+            inserted = _insert_new_shifts(db, new_rows)
+            raced = []
+            for row in new_rows:
+                key = (row["batch_id"], row["date"], row["shift_no"])
+                shift_id = inserted.get(key)
+                if shift_id is None:
+                    raced.append(row)
+                    continue
+                new_ids.append(shift_id)
+                items += line_item_rows(organization_id, shift_id, row["batch_id"], row["date"],
+                                        row["input_materials"], row["output_products"])
+
+            # Inserted by a concurrent import since the lookup: update those instead
+            racers = _existing_shifts(db, {(r["batch_id"], r["date"], r["shift_no"]) for r in raced})
+            for row in raced:
+                key = (row["batch_id"], row["date"], row["shift_no"])
+                shift_id, stored_hash = racers.get(key, (None, row["import_hash"]))
+                if stored_hash != row["import_hash"]:
+                    values = {k: v for k, v in row.items() if k not in ("organization_id", "batch_id", "date", "shift_no")}
+                    changed_rows.append({"id": shift_id, **values})
+                    changed_keys[shift_id] = key
+            new_rows = [row for row in new_rows if (row["batch_id"], row["date"], row["shift_no"]) in inserted]
+        if changed_rows:
+            db.execute(update(models.ShiftEntry), changed_rows)
+            for row in changed_rows:
+                batch_id, shift_date, _ = changed_keys[row["id"]]
+                items += line_item_rows(organization_id, row["id"], batch_id, shift_date,
+                                        row["input_materials"], row["output_products"])
+        write_line_items(db, items, replace_shift_ids=[row["id"] for row in changed_rows])
+        db.commit()
+        written_shift_ids += new_ids
+        written_shift_ids += [row["id"] for row in changed_rows]
+
+        created += len(new_rows)
+        updated += len(changed_rows)
+        unchanged += len(keyed) - len(new_rows) - len(changed_rows)
+        if on_chunk:
+            on_chunk({"rows": len(chunk), "created": len(new_rows), "updated": len(changed_rows)})
+
+    return {
+        "shifts_created": created,
+        "shifts_updated": updated,
+        "shifts_unchanged": unchanged,
+        "errors": errors,
+        "batch_ids": touched_batch_ids,
+        "shift_ids": written_shift_ids,
+    }
@@ -0,0 +1,41 @@
+# app/init_db.py
+"""
+Builds the schema of an empty database.
+
+    python -m app.init_db        # same as `alembic upgrade head` on an empty database
+
+The Alembic chain starts from a baseline revision holding the pre-Alembic
+tables, so a fresh database goes through the same migrations as existing
+ones. Apply later schema changes with `alembic upgrade head` as usual.
+Refuses to touch a database that already has tables.
+"""
+import os
+import sys
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from .database import engine
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+def init_db(bind=None) -> bool:
+    """Migrates an empty database to the Alembic head; False if the database is not empty."""
+    bind = bind or engine
+    existing = inspect(bind).get_table_names()
+    if existing:
+        print(f"⚠️ Database already has {len(existing)} tables; use `alembic upgrade head` instead")
+        return False
+
+    config = Config(ALEMBIC_INI)
+    with bind.connect() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+    print(f"✅ Created {len(inspect(bind).get_table_names())} tables at the Alembic head")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if init_db() else 1)
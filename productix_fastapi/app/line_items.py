@@ -0,0 +1,104 @@
+# app/line_items.py
+"""
+Normalized shift line items (shift_line_items).
+
+Every key of a shift's input_materials / output_products JSON is stored
+as one ShiftLineItem row (kind, field_name, amount, unit_price), together
+with the shift's organization, batch and date. The JSON stays the source
+of truth: line items are rewritten in the same transaction whenever a
+shift is written (shift endpoints, importer), so material-level reports
+can GROUP BY plain columns instead of decoding every shift.
+"""
+from typing import Iterable, List, Optional
+
+from sqlalchemy import case, func, insert
+from sqlalchemy.orm import Session
+
+from .metrics import amount_and_price
+from .models import ShiftEntry, ShiftLineItem
+
+INPUT = "input"
+OUTPUT = "output"
+
+
+def line_item_rows(organization_id: int, shift_id: int, batch_id: int, shift_date,
+                   input_materials: Optional[dict], output_products: Optional[dict]) -> List[dict]:
+    """Line item rows (insert mappings) for one shift's JSON."""
+    base = {"organization_id": organization_id, "shift_id": shift_id, "batch_id": batch_id, "date": shift_date}
+    rows = []
+    for name, val in (input_materials or {}).items():
+        amount, unit_price = amount_and_price(val)
+        rows.append({**base, "kind": INPUT, "field_name": str(name), "amount": amount, "unit_price": unit_price})
+    for name, val in (output_products or {}).items():
+        amount, _ = amount_and_price(val)
+        rows.append({**base, "kind": OUTPUT, "field_name": str(name), "amount": amount, "unit_price": None})
+    return rows
+
+
+def entry_rows(entry: ShiftEntry) -> List[dict]:
+    return line_item_rows(entry.organization_id, entry.id, entry.batch_id, entry.date,
+                          entry.input_materials, entry.output_products)
+
+
+def delete_line_items(db: Session, shift_ids: Iterable[int]) -> None:
+    shift_ids = list(shift_ids)
+    if shift_ids:
+        db.query(ShiftLineItem).filter(ShiftLineItem.shift_id.in_(shift_ids)).delete(synchronize_session=False)
+
+
+def write_line_items(db: Session, rows: List[dict], replace_shift_ids: Iterable[int] = ()) -> None:
+    """Bulk-inserts line item rows, first dropping those of `replace_shift_ids`."""
+    delete_line_items(db, replace_shift_ids)
+    if rows:
+        db.execute(insert(ShiftLineItem), rows)
+
+
+def sync_shift(db: Session, entry: ShiftEntry) -> None:
+    """Rewrites the line items of one (flushed) shift entry."""
+    write_line_items(db, entry_rows(entry), replace_shift_ids=[entry.id])
+
+
+def batch_field_totals(db: Session, batch_ids: Iterable[int]):
+    """
+    Per (batch, kind, field_name): amount, cost, entries, missing_price and the
+    unit price of the latest shift, in one windowed query over the line items.
+    Fields come in the order they first appeared, like the JSON fold did.
+    """
+    window = dict(partition_by=(ShiftLineItem.batch_id, ShiftLineItem.kind, ShiftLineItem.field_name))
+    price = func.coalesce(ShiftLineItem.unit_price, 0)
+    ranked = db.query(
+        ShiftLineItem.batch_id,
+        ShiftLineItem.kind,
+        ShiftLineItem.field_name,
+        price.label("unit_price"),
+        func.sum(ShiftLineItem.amount).over(**window).label("amount"),
+        func.sum(ShiftLineItem.amount * price).over(**window).label("cost"),
+        func.count(ShiftLineItem.id).over(**window).label("entries"),
+        func.sum(case((price == 0, 1), else_=0)).over(**window).label("missing_price"),
+        func.min(ShiftLineItem.id).over(**window).label("first_id"),
+        func.row_number().over(
+            order_by=(ShiftLineItem.shift_id.desc(), ShiftLineItem.id.desc()), **window
+        ).label("rn"),
+    ).filter(ShiftLineItem.batch_id.in_(list(batch_ids))).subquery()
+
+    return db.query(
+        ranked.c.batch_id, ranked.c.kind, ranked.c.field_name, ranked.c.amount,
+        ranked.c.cost, ranked.c.entries, ranked.c.missing_price, ranked.c.unit_price,
+    ).filter(ranked.c.rn == 1).order_by(ranked.c.batch_id, ranked.c.first_id)  # first-seen field order
+
+
+def daily_field_totals(db: Session, batch_id: int):
+    """Per (date, kind, field_name) amount and cost of one batch, oldest day first."""
+    cost = func.sum(ShiftLineItem.amount * func.coalesce(ShiftLineItem.unit_price, 0))
+    return (
+        db.query(
+            ShiftLineItem.date,
+            ShiftLineItem.kind,
+            ShiftLineItem.field_name,
+            func.sum(ShiftLineItem.amount).label("amount"),
+            cost.label("cost"),
+        )
+        .filter(ShiftLineItem.batch_id == batch_id)
+        .group_by(ShiftLineItem.date, ShiftLineItem.kind, ShiftLineItem.field_name)
+        .order_by(ShiftLineItem.date, ShiftLineItem.kind, ShiftLineItem.field_name)
+    )
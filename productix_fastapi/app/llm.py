@@ -0,0 +1,128 @@
+# app/llm.py
+"""
+Shared async client for every LLM (Gemini) call in the app.
+
+- The SDK is configured once from GOOGLE_API_KEY; its async transport and
+  the GenerativeModel objects are reused across requests.
+- Calls go through `generate()`, which awaits `generate_content_async`
+  under a global concurrency limit, so AI traffic no longer holds a
+  threadpool worker for the duration of the request.
+- The backend is pluggable: LLM_BACKEND=stub swaps in a local canned model
+  for tests and load runs, and `set_backend()` accepts any object with an
+  async `generate(prompt, model, system_instruction, timeout)` method.
+
+Environment:
+    GOOGLE_API_KEY       Gemini API key (Google_API_KEY, as in app/.env, also works)
+    LLM_BACKEND          "gemini" (default) or "stub"
+    LLM_MODEL            default model name
+    LLM_MAX_CONCURRENCY  max in-flight LLM calls per worker process
+    LLM_TIMEOUT          per-call timeout in seconds
+    LLM_STUB_DELAY       simulated latency of the stub backend, in seconds
+"""
+import asyncio
+import hashlib
+import os
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LLM_MODEL = os.getenv("LLM_MODEL", "models/gemini-2.5-flash")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_STUB_DELAY = float(os.getenv("LLM_STUB_DELAY", "0"))
+
+
+class LLMError(Exception):
+    """Raised when the LLM backend is unavailable or misconfigured."""
+
+
+class GeminiBackend:
+    def __init__(self, api_key: Optional[str]):
+        self.api_key = api_key
+        self._genai = None
+        self._models: Dict[Tuple[str, Optional[str]], object] = {}
+
+    def _model(self, model: str, system_instruction: Optional[str]):
+        if not self.api_key:
+            raise LLMError("API Key is not configured.")
+        if self._genai is None:
+            import google.generativeai as genai
+            genai.configure(api_key=self.api_key)
+            self._genai = genai
+        key = (model, system_instruction)
+        if key not in self._models:
+            self._models[key] = self._genai.GenerativeModel(model, system_instruction=system_instruction)
+        return self._models[key]
+
+    async def generate(self, prompt: str, model: str, system_instruction: Optional[str], timeout: float) -> str:
+        response = await self._model(model, system_instruction).generate_content_async(
+            prompt, request_options={"timeout": timeout}
+        )
+        return getattr(response, "text", "") or ""
+
+
+class StubBackend:
+    """Deterministic local model: same prompt, same answer, no network."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    async def generate(self, prompt: str, model: str, system_instruction: Optional[str], timeout: float) -> str:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        digest = hashlib.sha256(f"{system_instruction}\n{prompt}".encode()).hexdigest()[:12]
+        return (
+            f"[EFFICIENCY SCORE]\n80%\n"
+            f"[AI PREDICTION]\nStub prediction {digest}.\n"
+            f"[TOP INEFFICIENCIES]\n- Stub inefficiency\n"
+            f"[AI PRESCRIPTIONS]\n- Stub prescription\n"
+            f'{{"stub": "{digest}", "prompt_chars": {len(prompt)}}}'
+        )
+
+
+def _default_backend():
+    if LLM_BACKEND == "stub":
+        return StubBackend(delay=LLM_STUB_DELAY)
+    if LLM_BACKEND == "gemini":
+        # app/.env spells it Google_API_KEY; names are case-sensitive on Linux
+        return GeminiBackend(os.getenv("GOOGLE_API_KEY") or os.getenv("Google_API_KEY"))
+    raise LLMError(f"Unknown LLM_BACKEND: {LLM_BACKEND}")
+
+
+_backend = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = _default_backend()
+    return _backend
+
+
+def set_backend(backend) -> None:
+    """Replaces the process-wide backend (e.g. StubBackend() in tests)."""
+    global _backend
+    _backend = backend
+
+
+async def generate(
+    prompt: str,
+    system_instruction: Optional[str] = None,
+    model: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> str:
+    """Returns the model's text answer for `prompt`; raises on backend errors."""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    async with _semaphore:
+        return await get_backend().generate(
+            prompt,
+            model=model or LLM_MODEL,
+            system_instruction=system_instruction,
+            timeout=timeout or LLM_TIMEOUT,
+        )
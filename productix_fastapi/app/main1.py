@@ -1,10 +1,13 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 
 from .router import uploads
 
 from .router import Dashboard, Productivity_calculator, agent, ai_analysis, analytics, chatbot, login
 from .router import auth, User
-from .database import Base, engine
+from .database import warm_pool
 from .router import organization
 from .router import Product
 from .router import Batch    
@@ -17,10 +20,31 @@ from .router import system_admin_router
 
 
 
-#Base.metadata.drop_all(bind=engine)   # drops all tables
-Base.metadata.create_all(bind=engine) 
+# The schema is not created at import time, so importing the app needs no
+# database and worker boot stays fast. Bootstrap an empty database with
+# `python -m app.init_db`; apply schema changes with `alembic upgrade head`.
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open a few pooled connections before traffic arrives; a database that is
+    # not reachable yet must not keep the worker from starting
+    try:
+        opened = await run_in_threadpool(warm_pool)
+        print(f"🔌 Database pool warmed ({opened} connections)")
+    except Exception as e:
+        print("⚠️ Database pool warm-up failed:", e)
+    # Imports run in this process's threads, so a restart orphans unfinished ones
+    try:
+        recovered = await run_in_threadpool(uploads.recover_import_jobs)
+        if any(recovered.values()):
+            print(f"📘 Recovered interrupted imports: {recovered['requeued']} re-queued, {recovered['failed']} failed")
+    except Exception as e:
+        print("⚠️ Import recovery failed:", e)
+    yield
+
 
-app = FastAPI(title="Multi-tenant Productivity CRM")
+app = FastAPI(title="Multi-tenant Productivity CRM", lifespan=lifespan)
 
 origins = [
     "http://localhost:5173",
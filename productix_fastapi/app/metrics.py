@@ -0,0 +1,52 @@
+# app/metrics.py
+"""
+Derived per-shift metrics.
+
+ShiftEntry keeps its inputs and outputs as free-form JSON
+({field_name: {amount, unit_price}}). The totals below are materialized
+on the row whenever it is written so reports can sum plain columns.
+"""
+
+
+def _as_float(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def amount_and_price(val):
+    """(amount, unit_price) of one JSON value; bare numbers are amounts without a price."""
+    if isinstance(val, dict):
+        return _as_float(val.get("amount")), _as_float(val.get("unit_price"))
+    return _as_float(val), 0.0
+
+
+def shift_totals(input_materials, output_products) -> dict:
+    """
+    Computes total_output, total_input_amount and total_input_cost
+    from a shift's input/output JSON. Missing or invalid values count as 0.
+    """
+    total_input_amount = 0.0
+    total_input_cost = 0.0
+    for val in (input_materials or {}).values():
+        amount, unit_price = amount_and_price(val)
+        total_input_amount += amount
+        total_input_cost += amount * unit_price
+
+    total_output = 0.0
+    for val in (output_products or {}).values():
+        amount, _ = amount_and_price(val)
+        total_output += amount
+
+    return {
+        "total_output": total_output,
+        "total_input_amount": total_input_amount,
+        "total_input_cost": total_input_cost,
+    }
+
+
+def apply_shift_totals(entry) -> None:
+    """Refreshes the materialized totals on a ShiftEntry from its JSON columns."""
+    for key, value in shift_totals(entry.input_materials, entry.output_products).items():
+        setattr(entry, key, value)
@@ -3,8 +3,10 @@
 from decimal import Decimal
 from sqlalchemy import (
     Column, Integer, String, Date, Enum, ForeignKey, DECIMAL,
-    TIMESTAMP, Boolean, DateTime, func, Text, JSON, Numeric, TypeDecorator
+    TIMESTAMP, Boolean, DateTime, func, Text, JSON, Numeric, TypeDecorator, UniqueConstraint,
+    Index, DDL, event
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from .database import Base
 import enum
@@ -150,6 +152,7 @@ class ProductivityCalculation(Base):
 
 class AIAnalysis(Base):
     __tablename__ = "ai_analysis"
+    __table_args__ = (Index("ix_ai_analysis_org_id", "organization_id", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
@@ -168,6 +171,9 @@ class AIAnalysis(Base):
     outputs = Column(JSON)
     single_productivity = Column(JSON)
 
+    # Content hash of the analyzed data (see app/ai_cache.py)
+    cache_key = Column(String(64), nullable=True, index=True)
+
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", back_populates="ai_analyses")
@@ -182,13 +188,29 @@ class ChatbotHistory(Base):
 
     query = Column(Text, nullable=False)
     response = Column(Text, nullable=False)
+    # Ids of the records sent as context: {"products": [...], "batches": [...], "shifts": [...]}
     records = Column(JSON, nullable=True)
+    # sha256 of the prompt context, stored once in chat_context_snapshots
+    context_hash = Column(String(64), nullable=True, index=True)
 
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", back_populates="chatbot_history")
 
 
+class ChatContextSnapshot(Base):
+    """Distinct chatbot prompt contexts, deduplicated per organization by hash."""
+    __tablename__ = "chat_context_snapshots"
+    __table_args__ = (UniqueConstraint("organization_id", "context_hash", name="uq_chat_context_org_hash"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    context_hash = Column(String(64), nullable=False)
+    context = Column(Text, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 class AIReport(Base):
     __tablename__ = "ai_reports"
 
@@ -209,8 +231,27 @@ class AIReport(Base):
 # ------------------------
 # Products & Batches
 # ------------------------
+def _can_install_pg_trgm(ddl, target, bind, **kw) -> bool:
+    return bind.dialect.name == "postgresql" and bind.exec_driver_sql(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+    ).first() is not None
+
+
+def _has_pg_trgm(ddl, target, bind, **kw) -> bool:
+    """Trigram indexes are only created on Postgres servers that ship pg_trgm."""
+    return bind.dialect.name == "postgresql" and bind.exec_driver_sql(
+        "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+    ).first() is not None
+
+
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_org_name", "organization_id", "name"),
+        # Trigram index for fuzzy name lookups (app/entity_lookup.py); Postgres only
+        Index("ix_products_name_trgm", "name", postgresql_using="gin",
+              postgresql_ops={"name": "gin_trgm_ops"}).ddl_if(callable_=_has_pg_trgm),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
@@ -232,6 +273,17 @@ class Product(Base):
 
 class Batch(Base):
     __tablename__ = "batches"
+    __table_args__ = (
+        Index("ix_batches_org_batch_number", "organization_id", "batch_number"),
+        # create_batch: last batch of a product (ORDER BY id DESC LIMIT 1)
+        Index("ix_batches_org_product_id", "organization_id", "product_id", "id"),
+        # dashboard running-batch count
+        Index("ix_batches_org_status", "organization_id", "status"),
+        # recent batches per product (product detail, chatbot)
+        Index("ix_batches_product_start_date", "product_id", "start_date"),
+        Index("ix_batches_batch_number_trgm", "batch_number", postgresql_using="gin",
+              postgresql_ops={"batch_number": "gin_trgm_ops"}).ddl_if(callable_=_has_pg_trgm),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
@@ -244,13 +296,44 @@ class Batch(Base):
     organization = relationship("Organization", back_populates="batches")
     product = relationship("Product", back_populates="batches")
     shift_entries = relationship("ShiftEntry", back_populates="batch")
+    rollup = relationship("BatchRollup", uselist=False, cascade="all, delete-orphan")
+
+
+# gin_trgm_ops above needs the pg_trgm extension before the tables are created
+event.listen(
+    Base.metadata, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(callable_=_can_install_pg_trgm),
+)
+
+
+class BatchRollup(Base):
+    """Running report totals for a batch, maintained by app/rollups.py."""
+    __tablename__ = "batch_rollups"
+
+    batch_id = Column(Integer, ForeignKey("batches.id", ondelete="CASCADE"), primary_key=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+
+    # {field_name: {amount, cost, unit_price, entries, missing_price}}
+    inputs = Column(JSON, nullable=False, default=dict)
+    # {field_name: {amount, entries}}
+    outputs = Column(JSON, nullable=False, default=dict)
+    shift_count = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 # ------------------------
 # Shift Entries
 # ------------------------
 class JSONDecimal(TypeDecorator):
+    """JSON with Decimals converted to floats; stored as JSONB on Postgres (indexable)."""
     impl = JSON
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(JSON())
 
     def process_bind_param(self, value, dialect):
         if value is None:
@@ -273,6 +356,19 @@ class JSONDecimal(TypeDecorator):
 
 class ShiftEntry(Base):
     __tablename__ = "shift_entries"
+    __table_args__ = (
+        # dashboard shifts_today, date-ranged analytics, recent-shift context
+        Index("ix_shift_entries_org_date", "organization_id", "date"),
+        # tenant listings and analytics keyset pagination (ORDER BY id)
+        Index("ix_shift_entries_org_id", "organization_id", "id"),
+        # per-batch trend/report; unique, it is the importer's ON CONFLICT key
+        Index("ix_shift_entries_batch_date_shift", "batch_id", "date", "shift_no", unique=True),
+        # material-name (key) and containment lookups on the JSONB columns; Postgres only
+        Index("ix_shift_entries_input_materials_gin", "input_materials",
+              postgresql_using="gin").ddl_if(dialect="postgresql"),
+        Index("ix_shift_entries_output_products_gin", "output_products",
+              postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
@@ -284,13 +380,47 @@ class ShiftEntry(Base):
     input_materials = Column(JSONDecimal, nullable=True)  # {field_name: {amount, unit_price}}
     output_products = Column(JSONDecimal, nullable=True)  # {field_name: {amount}}
 
+    # Totals derived from the JSON above, refreshed on every write (see app/metrics.py)
+    total_output = Column(Numeric(18, 4), nullable=False, default=0, server_default="0")
+    total_input_amount = Column(Numeric(18, 4), nullable=False, default=0, server_default="0")
+    total_input_cost = Column(Numeric(18, 4), nullable=False, default=0, server_default="0")
+
     admin_notes = Column(String, nullable=True)
+    # sha256 of the imported row content; lets re-imports skip unchanged rows
+    import_hash = Column(String(64), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
     organization = relationship("Organization", back_populates="shift_entries")
     batch = relationship("Batch", back_populates="shift_entries")
 
+
+class ShiftLineItem(Base):
+    """
+    One input material or output product of a shift, normalized from the
+    shift's JSON columns (see app/line_items.py) so material-level reports
+    are plain GROUP BY queries.
+    """
+    __tablename__ = "shift_line_items"
+    __table_args__ = (
+        # per-material totals over time ("steel used per month")
+        Index("ix_shift_line_items_org_field_date", "organization_id", "field_name", "date"),
+        # batch reports and rollup rebuilds
+        Index("ix_shift_line_items_batch_kind_field", "batch_id", "kind", "field_name"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    shift_id = Column(Integer, ForeignKey("shift_entries.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Copied from the shift so reports need no join
+    batch_id = Column(Integer, ForeignKey("batches.id"), nullable=False)
+    date = Column(Date, nullable=False)
+
+    kind = Column(String(6), nullable=False)  # input | output
+    field_name = Column(String, nullable=False)
+    amount = Column(Numeric(18, 4), nullable=False, default=0)
+    unit_price = Column(Numeric(18, 4), nullable=True)  # inputs only; 0 when missing
+
 # ------------------------
 # Productivity Calculations
 
@@ -310,6 +440,7 @@ class FileUpload(Base):
     file_path = Column(Text, nullable=False)
     original_filename = Column(Text)
     status = Column(String, default="uploaded")  # uploaded, validating, processed, failed
+    worker_id = Column(String, nullable=True)  # host:pid:boot of the process that owns the import
     rows_processed = Column(Integer, default=0)
     batches_created = Column(Integer, default=0)
     shifts_created = Column(Integer, default=0)
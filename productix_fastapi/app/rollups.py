@@ -0,0 +1,186 @@
+# app/rollups.py
+"""
+Incrementally maintained per-batch report totals (batch_rollups).
+
+Every write to a ShiftEntry adds its contribution to, or removes it from,
+the BatchRollup row of its batch, so the batch report reads one row
+instead of re-scanning the batch's shifts.
+
+Callers flush the shift change first and then call apply_shift_change in
+the same transaction. create_batch adds an empty row with the batch and
+the batch_rollups migration backfills the rows of existing batches. A
+batch that still has none is given one with ON CONFLICT DO NOTHING, so
+concurrent first shifts cannot collide, rebuilt from the (already
+flushed) line items, see app/line_items.py, instead of applying the
+delta. Reads never write: get_batch_rollup computes a missing rollup on
+the fly.
+"""
+from collections import namedtuple
+from typing import Iterable, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .line_items import INPUT, batch_field_totals
+from .metrics import amount_and_price
+from .models import BatchRollup, ShiftEntry
+
+# Snapshot of the parts of a ShiftEntry that feed its batch rollup
+ShiftContribution = namedtuple("ShiftContribution", ["batch_id", "input_materials", "output_products"])
+
+
+def contribution(entry: ShiftEntry) -> ShiftContribution:
+    return ShiftContribution(entry.batch_id, entry.input_materials, entry.output_products)
+
+
+def _fold(inputs: dict, outputs: dict, shift: ShiftContribution, sign: int) -> None:
+    """
+    Adds (sign=1) or removes (sign=-1) one shift's contribution in place.
+    Values are coerced like the line items (amount_and_price), so this
+    agrees with rebuild_batch_rollups.
+    """
+    for name, val in (shift.input_materials or {}).items():
+        amount, unit_price = amount_and_price(val)
+        stats = inputs.setdefault(
+            name, {"amount": 0, "cost": 0, "unit_price": 0, "entries": 0, "missing_price": 0}
+        )
+        stats["amount"] += sign * amount
+        stats["cost"] += sign * amount * unit_price
+        stats["entries"] += sign
+        if unit_price == 0:
+            stats["missing_price"] += sign
+        if sign > 0:
+            stats["unit_price"] = unit_price  # latest price seen
+        if stats["entries"] <= 0:
+            del inputs[name]
+
+    for name, val in (shift.output_products or {}).items():
+        stats = outputs.setdefault(name, {"amount": 0, "entries": 0})
+        stats["amount"] += sign * amount_and_price(val)[0]
+        stats["entries"] += sign
+        if stats["entries"] <= 0:
+            del outputs[name]
+
+
+def empty_rollup(organization_id: int, batch_id: int) -> BatchRollup:
+    return BatchRollup(batch_id=batch_id, organization_id=organization_id, inputs={}, outputs={}, shift_count=0)
+
+
+def _ensure_rollup_rows(db: Session, organization_id: int, batch_ids: Iterable[int]) -> set:
+    """
+    Inserts empty rollup rows for batches that have none and returns the ids
+    it inserted. A row inserted concurrently by another transaction is
+    skipped (ON CONFLICT DO NOTHING waits for it instead of failing).
+    """
+    dialect_insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+    stmt = (
+        dialect_insert(BatchRollup)
+        .values([
+            {"batch_id": batch_id, "organization_id": organization_id, "inputs": {}, "outputs": {}, "shift_count": 0}
+            for batch_id in sorted(batch_ids)
+        ])
+        .on_conflict_do_nothing(index_elements=["batch_id"])
+        .returning(BatchRollup.batch_id)
+    )
+    return set(db.scalars(stmt))
+
+
+def _lock_rollups(db: Session, batch_ids: Iterable[int]) -> dict:
+    # Locked in batch_id order so concurrent writers cannot deadlock
+    return {
+        r.batch_id: r
+        for r in db.query(BatchRollup)
+        .filter(BatchRollup.batch_id.in_(set(batch_ids)))
+        .order_by(BatchRollup.batch_id)
+        .populate_existing()
+        .with_for_update()
+    }
+
+
+def _compute_rollups(db: Session, batch_ids: set):
+    """(inputs, outputs) per batch plus shift counts, from grouped queries over the line items."""
+    folded = {batch_id: ({}, {}) for batch_id in batch_ids}
+    for row in batch_field_totals(db, batch_ids):
+        inputs, outputs = folded[row.batch_id]
+        if row.kind == INPUT:
+            inputs[row.field_name] = {
+                "amount": float(row.amount or 0),
+                "cost": float(row.cost or 0),
+                "unit_price": float(row.unit_price or 0),
+                "entries": row.entries,
+                "missing_price": int(row.missing_price or 0),
+            }
+        else:
+            outputs[row.field_name] = {"amount": float(row.amount or 0), "entries": row.entries}
+
+    shift_counts = dict(
+        db.query(ShiftEntry.batch_id, func.count(ShiftEntry.id))
+        .filter(ShiftEntry.batch_id.in_(batch_ids))
+        .group_by(ShiftEntry.batch_id)
+    )
+    return folded, shift_counts
+
+
+def rebuild_batch_rollups(db: Session, organization_id: int, batch_ids: Iterable[int]) -> None:
+    """Recomputes the rollups of the given batches with grouped queries over their line items."""
+    batch_ids = set(batch_ids)
+    if not batch_ids:
+        return
+
+    _ensure_rollup_rows(db, organization_id, batch_ids)
+    existing = _lock_rollups(db, batch_ids)
+    folded, shift_counts = _compute_rollups(db, batch_ids)
+    for batch_id, (inputs, outputs) in folded.items():
+        rollup = existing[batch_id]
+        rollup.inputs = inputs
+        rollup.outputs = outputs
+        rollup.shift_count = shift_counts.get(batch_id, 0)
+    db.flush()
+
+
+def apply_shift_change(
+    db: Session,
+    organization_id: int,
+    old: Optional[ShiftContribution] = None,
+    new: Optional[ShiftContribution] = None,
+) -> None:
+    """
+    Applies a flushed insert (new), delete (old) or update (old and new)
+    of a shift entry to the affected batch rollups.
+    """
+    changes = [(old, -1), (new, 1)]
+    batch_ids = {shift.batch_id for shift, _ in changes if shift is not None}
+
+    # Batches without a row yet are rebuilt, which already includes this change
+    created = _ensure_rollup_rows(db, organization_id, batch_ids)
+    if created:
+        rebuild_batch_rollups(db, organization_id, created)
+    existing = _lock_rollups(db, batch_ids - created)
+
+    for shift, sign in changes:
+        rollup = existing.get(shift.batch_id) if shift is not None else None
+        if rollup is None:
+            continue
+        # Copy so the JSON columns are seen as changed
+        inputs = {k: dict(v) for k, v in (rollup.inputs or {}).items()}
+        outputs = {k: dict(v) for k, v in (rollup.outputs or {}).items()}
+        _fold(inputs, outputs, shift, sign)
+        rollup.inputs = inputs
+        rollup.outputs = outputs
+        rollup.shift_count = (rollup.shift_count or 0) + sign
+    db.flush()
+
+
+def get_batch_rollup(db: Session, organization_id: int, batch_id: int) -> BatchRollup:
+    """
+    Returns the rollup of a batch. A batch without a stored rollup gets one
+    computed on the fly (not added to the session; reads do not write).
+    """
+    rollup = db.get(BatchRollup, batch_id)
+    if rollup is None:
+        folded, shift_counts = _compute_rollups(db, {batch_id})
+        rollup = empty_rollup(organization_id, batch_id)
+        rollup.inputs, rollup.outputs = folded[batch_id]
+        rollup.shift_count = shift_counts.get(batch_id, 0)
+    return rollup
@@ -1,8 +1,9 @@
 from datetime import date
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
 
-from ..models import User, Product, Batch, ShiftEntry
+from ..models import Product, Batch, ShiftEntry
 from ..core_logic import  ai_analysis_for_batch
 from ..schemas import AIAnalysisCreate, BatchResponse, ProductRecord
 from ..deps import get_current_user
@@ -10,7 +11,8 @@ from sqlalchemy.orm import Session
 from typing import List
 from .. import models, schemas, deps
 from ..database import get_db
-import pandas as pd
+from ..line_items import INPUT, daily_field_totals
+from ..rollups import empty_rollup, get_batch_rollup, rebuild_batch_rollups
 from sqlalchemy import func
 import json
 
@@ -19,7 +21,7 @@ router = APIRouter(prefix="/batches", tags=["Batches"])
 @router.get("/org", response_model=List[schemas.BatchResponse])
 def get_org_batches(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)  # works for org_admin and org_user
+    current_user: deps.Principal = Depends(get_current_user)  # works for org_admin and org_user
 ):
     return db.query(models.Batch).filter(
         models.Batch.organization_id == current_user.organization_id
@@ -28,7 +30,7 @@ def get_org_batches(
 # Create Batch (org_admin only)
 # ------------------------------------------------
 @router.post("/", response_model=schemas.BatchResponse)
-def create_batch(batch: schemas.BatchCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def create_batch(batch: schemas.BatchCreate, db: Session = Depends(get_db), current_user: deps.Principal = Depends(get_current_user)):
     # Ensure organization ID is taken from current user's org
     organization_id = current_user.organization_id
 
@@ -60,6 +62,9 @@ def create_batch(batch: schemas.BatchCreate, db: Session = Depends(get_db), curr
     )
 
     db.add(db_batch)
+    db.flush()
+    # Empty report totals, updated by every shift write (app/rollups.py)
+    db.add(empty_rollup(db_batch.organization_id, db_batch.id))
     db.commit()
     db.refresh(db_batch)
     return db_batch
@@ -72,7 +77,7 @@ def create_batch(batch: schemas.BatchCreate, db: Session = Depends(get_db), curr
 def list_batches(
     product_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: deps.Principal = Depends(get_current_user)
 ):
     # Verify product belongs to user's org
     product = db.query(models.Product).filter(
@@ -95,7 +100,7 @@ def list_batches(
 def get_batch(
     batch_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: deps.Principal = Depends(get_current_user)
 ):
     batch = (
         db.query(models.Batch)
@@ -118,7 +123,7 @@ def update_batch(
     batch_id: int,
     batch_in: schemas.BatchUpdate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.require_role("org_admin"))
+    current_user: deps.Principal = Depends(deps.require_role("org_admin"))
 ):
     batch = (
         db.query(models.Batch)
@@ -152,7 +157,7 @@ def update_batch(
 def delete_batch(
     batch_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.require_role("org_admin"))
+    current_user: deps.Principal = Depends(deps.require_role("org_admin"))
 ):
     batch = (
         db.query(models.Batch)
@@ -177,7 +182,7 @@ def delete_batch(
 def close_batch(
     batch_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: deps.Principal = Depends(get_current_user)
 ):
     batch = db.query(models.Batch).filter(
         models.Batch.id == batch_id,
@@ -192,6 +197,8 @@ def close_batch(
 
     batch.status = "closed"
     batch.end_date = date.today()
+    # Numbers are final from here on; settle the rollup exactly once
+    rebuild_batch_rollups(db, batch.organization_id, [batch.id])
 
     db.commit()
     db.refresh(batch)
@@ -214,7 +221,7 @@ def safe_json_load(data):
 def get_shift_trend(
     batch_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: deps.Principal = Depends(get_current_user)
 ):
     entries = (
         db.query(models.ShiftEntry)
@@ -230,19 +237,8 @@ def get_shift_trend(
 
     trend_data = []
     for entry in reversed(entries):
-        inputs = safe_json_load(entry.input_materials)
-        outputs = safe_json_load(entry.output_products)
-
-        # compute totals
-        total_cost = 0
-        for v in inputs.values():
-            if isinstance(v, dict) and "amount" in v and "unit_price" in v:
-                total_cost += float(v["amount"]) * float(v["unit_price"])
-
-        output_units = 0
-        for v in outputs.values():
-            if isinstance(v, dict) and "amount" in v:
-                output_units += float(v["amount"])
+        output_units = float(entry.total_output or 0)
+        total_cost = float(entry.total_input_cost or 0)
 
         trend_data.append({
             "date": entry.date,
@@ -262,7 +258,7 @@ def get_shift_trend(
 def export_batch_excel(
     batch_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: deps.Principal = Depends(get_current_user)
 ):
     batch = db.query(models.Batch).filter(
         models.Batch.id == batch_id,
@@ -309,6 +305,8 @@ def export_batch_excel(
 
     data.append(base)
 
+    import pandas as pd  # only needed for the Excel export
+
     df = pd.DataFrame(data)
     file_path = f"batch_{batch_id}_report.xlsx"
     df.to_excel(file_path, index=False)
@@ -326,7 +324,7 @@ def export_batch_excel(
 def daily_report(
     batch_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: deps.Principal = Depends(get_current_user)
 ):
     # Ensure batch belongs to org
     batch = db.query(models.Batch).filter(
@@ -336,69 +334,24 @@ def daily_report(
     if not batch:
         raise HTTPException(status_code=404, detail="Batch not found")
 
-    # Fetch all shift entries
-    shift_entries = (
-        db.query(models.ShiftEntry)
-        .filter(models.ShiftEntry.batch_id == batch.id)
-        .order_by(models.ShiftEntry.date)
-        .all()
-    )
-
+    # One grouped query over the batch's line items: (date, kind, field) sums
     daily_summary_map = {}
+    for row in daily_field_totals(db, batch.id):
+        day = daily_summary_map.setdefault(
+            row.date, {"date": row.date, "totals": {}, "cost": 0.0, "inputs": 0.0, "units": 0.0}
+        )
+        amount = float(row.amount or 0)
+        day["totals"][row.field_name] = day["totals"].get(row.field_name, 0) + amount
+        if row.kind == INPUT:
+            day["cost"] += float(row.cost or 0)
+            day["inputs"] += amount
+        else:
+            day["units"] += amount
 
-    for entry in shift_entries:
-        date_key = entry.date
-
-        if date_key not in daily_summary_map:
-            daily_summary_map[date_key] = {"date": date_key, "totals": {}}
-
-        totals = daily_summary_map[date_key]["totals"]
-
-        # Parse input materials safely
-        input_materials = entry.input_materials or {}
-        if isinstance(input_materials, str):
-            import json
-            try:
-                input_materials = json.loads(input_materials)
-            except:
-                input_materials = {}
-
-        # Parse output products safely
-        output_products = entry.output_products or {}
-        if isinstance(output_products, str):
-            import json
-            try:
-                output_products = json.loads(output_products)
-            except:
-                output_products = {}
-
-        # --- Aggregate Inputs and Compute Cost ---
-        total_cost = 0
-        total_inputs = 0
-        for name, val in input_materials.items():
-            if isinstance(val, dict):
-                amount = val.get("amount", 0)
-                unit_price = val.get("unit_price", 0)
-                totals[name] = totals.get(name, 0) + amount
-                total_cost += amount * unit_price
-                total_inputs += amount
-            elif isinstance(val, (int, float)):
-                totals[name] = totals.get(name, 0) + val
-                total_inputs += val
-        # --- Aggregate Outputs ---
-        total_units = 0
-        for name, val in output_products.items():
-            if isinstance(val, dict):
-                amount = val.get("amount", 0)
-            elif isinstance(val, (int, float)):
-                amount = val
-            else:
-                amount = 0
-            totals[name] = totals.get(name, 0) + amount
-            total_units += amount
-
-        # Store total_cost per day
-        totals["total input cost"] = totals.get("total_cost", 0) + total_cost
+    for day in daily_summary_map.values():
+        totals = day["totals"]
+        total_cost, total_inputs, total_units = day.pop("cost"), day.pop("inputs"), day.pop("units")
+        totals["total input cost"] = total_cost
 
         # Compute derived metrics
         if total_units > 0:
@@ -423,7 +376,7 @@ def daily_report(
 def get_batch_report(
     batch_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: deps.Principal = Depends(get_current_user)
 ):
     batch = db.query(models.Batch).filter(
         models.Batch.id == batch_id,
@@ -433,46 +386,16 @@ def get_batch_report(
     if not batch:
         raise HTTPException(status_code=404, detail="Batch not found")
 
-    shift_entries = db.query(models.ShiftEntry).filter(
-        models.ShiftEntry.batch_id == batch.id
-    ).all()
+    # ---- Totals come pre-aggregated from the batch rollup ----
+    rollup = get_batch_rollup(db, current_user.organization_id, batch.id)
 
-    input_totals = {}
-    input_costs = {}
-    input_unit_prices = {}
-    output_totals = {}
-    missing_prices = []
-
-    total_output = 0
-
-    # ---- Aggregate Inputs & Outputs ----
-    for entry in shift_entries:
-        # ---- Inputs ----
-        if entry.input_materials:
-            for k, v in entry.input_materials.items():
-                if isinstance(v, dict):
-                    amount = v.get("amount", 0)
-                    unit_price = v.get("unit_price", 0) or 0
-                else:
-                    amount = v
-                    unit_price = 0
-
-                input_totals[k] = input_totals.get(k, 0) + amount
-                input_unit_prices[k] = unit_price
-                input_costs[k] = input_costs.get(k, 0) + (amount * unit_price)
-
-                if unit_price == 0:
-                    missing_prices.append(k)
-
-        # ---- Outputs ----
-        if entry.output_products:
-            for k, v in entry.output_products.items():
-                if isinstance(v, dict):
-                    amount = v.get("amount", 0)
-                else:
-                    amount = v
-                output_totals[k] = output_totals.get(k, 0) + amount
-                total_output += amount
+    input_totals = {k: v["amount"] for k, v in rollup.inputs.items()}
+    input_costs = {k: v["cost"] for k, v in rollup.inputs.items()}
+    input_unit_prices = {k: v["unit_price"] for k, v in rollup.inputs.items()}
+    output_totals = {k: v["amount"] for k, v in rollup.outputs.items()}
+    missing_prices = [k for k, v in rollup.inputs.items() if v["missing_price"] > 0]
+
+    total_output = sum(output_totals.values())
 
     # ---- Overall totals ----
     total_cost = sum(input_costs.values())
@@ -527,6 +450,8 @@ def close_batch(batch_id: int, db: Session = Depends(get_db), user=Depends(get_c
 
     batch.status = "closed"
     batch.end_date = date.today()
+    # Numbers are final from here on; settle the rollup exactly once
+    rebuild_batch_rollups(db, batch.organization_id, [batch.id])
     db.commit()
     db.refresh(batch)
 
@@ -541,26 +466,30 @@ def close_batch(batch_id: int, db: Session = Depends(get_db), user=Depends(get_c
 # AI Analysis Endpoint
 # -----------------------------
 @router.get("/{batch_id}/ai_analysis")
-def batch_ai_analysis_endpoint(
+async def batch_ai_analysis_endpoint(
     batch_id: int,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: deps.Principal = Depends(get_current_user)
 ):
-    # Fetch batch
-    batch = db.query(Batch).filter(
-        Batch.id == batch_id,
-        Batch.organization_id == user.organization_id
-    ).first()
-    if not batch:
-        raise HTTPException(status_code=404, detail="Batch not found")
-
-    # Fetch all shift entries
-    shift_entries = db.query(ShiftEntry).filter(ShiftEntry.batch_id == batch.id).all()
-    if not shift_entries:
-        raise HTTPException(status_code=404, detail="No shift entries found")
+    def load():
+        # Fetch batch
+        batch = db.query(Batch).filter(
+            Batch.id == batch_id,
+            Batch.organization_id == user.organization_id
+        ).first()
+        if not batch:
+            raise HTTPException(status_code=404, detail="Batch not found")
+
+        # Fetch all shift entries
+        shift_entries = db.query(ShiftEntry).filter(ShiftEntry.batch_id == batch.id).all()
+        if not shift_entries:
+            raise HTTPException(status_code=404, detail="No shift entries found")
+        return batch, shift_entries
+
+    batch, shift_entries = await run_in_threadpool(load)
 
     # Call AI analysis function
-    ai_result = ai_analysis_for_batch(batch, shift_entries)
+    ai_result = await ai_analysis_for_batch(batch, shift_entries)
 
     # Return dashboard-ready JSON
     return {
@@ -9,6 +9,28 @@ from ..deps import get_current_user
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
+def _product_totals(db: Session, org_id: int) -> dict:
+    """
+    Returns {product_id: (total_output, total_input_cost)} for the organization,
+    summed from the materialized ShiftEntry totals in one grouped query.
+    """
+    rows = (
+        db.query(
+            Batch.product_id,
+            func.coalesce(func.sum(ShiftEntry.total_output), 0),
+            func.coalesce(func.sum(ShiftEntry.total_input_cost), 0),
+        )
+        .join(Batch, ShiftEntry.batch_id == Batch.id)
+        .filter(Batch.organization_id == org_id)
+        .group_by(Batch.product_id)
+        .all()
+    )
+    return {
+        product_id: (float(output), float(cost))
+        for product_id, output, cost in rows
+    }
+
+
 @router.get("/summary")
 def dashboard_summary(db: Session = Depends(get_db), tenant=Depends(get_current_user)):
     org_id = tenant.organization_id
@@ -24,37 +46,12 @@ def dashboard_summary(db: Session = Depends(get_db), tenant=Depends(get_current_
         .count()
     )
 
-    # --- Aggregates ---
+    # --- Aggregates (one grouped query for all products) ---
     total_output_units = 0.0
     total_cost = 0.0
     productivity_ratios = []
 
-    # --- Loop through products for totals ---
-    products = db.query(Product).filter(Product.organization_id == org_id).all()
-    for product in products:
-        product_entries = (
-            db.query(ShiftEntry)
-            .join(Batch, ShiftEntry.batch_id == Batch.id)
-            .filter(Batch.product_id == product.id)
-            .all()
-        )
-
-        product_output = 0.0
-        product_input_cost = 0.0
-
-        for entry in product_entries:
-            # --- Output total ---
-            if entry.output_products:
-                for val in entry.output_products.values():
-                    product_output += float(val.get("amount", 0))
-
-            # --- Input cost total ---
-            if entry.input_materials:
-                for val in entry.input_materials.values():
-                    amt = float(val.get("amount", 0))
-                    price = float(val.get("unit_price", 0))
-                    product_input_cost += amt * price
-
+    for product_output, product_input_cost in _product_totals(db, org_id).values():
         if product_output > 0 and product_input_cost > 0:
             ratio = (product_output / product_input_cost) * 100
             productivity_ratios.append(ratio)
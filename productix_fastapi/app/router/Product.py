@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from ..models import Batch
 from ..deps import get_current_user
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from typing import List
 from .. import models, schemas, deps
 from ..database import get_db
@@ -16,7 +17,7 @@ router = APIRouter(prefix="/products", tags=["Products"])
 def create_product(
     product_in: schemas.ProductCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.require_role("org_admin"))
+    current_user: deps.Principal = Depends(deps.require_role("org_admin"))
 ):
     product = models.Product(
         name=product_in.name,
@@ -37,7 +38,7 @@ import json
 @router.get("/", response_model=List[schemas.ProductResponse])
 def list_products(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.get_current_user)
+    current_user: deps.Principal = Depends(deps.get_current_user)
 ):
     products = db.query(models.Product).filter(
         models.Product.organization_id == current_user.organization_id
@@ -58,7 +59,7 @@ def list_products(
 def get_product(
     product_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.get_current_user)
+    current_user: deps.Principal = Depends(deps.get_current_user)
 ):
     product = db.query(models.Product).filter(
         models.Product.id == product_id,
@@ -77,7 +78,7 @@ def update_product(
     product_id: int,
     product_in: schemas.ProductUpdate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.require_role("org_admin"))
+    current_user: deps.Principal = Depends(deps.require_role("org_admin"))
 ):
     product = db.query(models.Product).filter(
         models.Product.id == product_id,
@@ -128,19 +129,30 @@ def trend_last_batches(product_id: int, n: int = 3, db: Session = Depends(get_db
         .all()
     )
 
+    # One grouped query for the totals of all selected batches
+    rows = (
+        db.query(
+            models.ShiftEntry.batch_id,
+            func.coalesce(func.sum(models.ShiftEntry.total_output), 0),
+            func.coalesce(func.sum(models.ShiftEntry.total_input_cost), 0),
+        )
+        .filter(models.ShiftEntry.batch_id.in_([b.id for b in last_batches]))
+        .group_by(models.ShiftEntry.batch_id)
+        .all()
+    )
+    batch_totals = {batch_id: (float(output), float(cost)) for batch_id, output, cost in rows}
+
     trend_data = []
     for batch in reversed(last_batches):
-        entries = db.query(models.ShiftEntry).filter(models.ShiftEntry.batch_id == batch.id).all()
-        total_output = sum(e.output_units for e in entries)
-        total_cost = sum(e.total_cost for e in entries)
+        total_output, total_cost = batch_totals.get(batch.id, (0.0, 0.0))
         trend_data.append({
-            "batch_no": batch.batch_no,
+            "batch_no": batch.batch_number,
             "start_date": batch.start_date,
             "end_date": batch.end_date,
             "total_output": total_output,
-            "total_cost": float(total_cost),
-            "cost_per_unit": float(total_cost / total_output) if total_output > 0 else 0,
-            "productivity_ratio": float(total_output / total_cost) if total_cost > 0 else 0
+            "total_cost": total_cost,
+            "cost_per_unit": total_cost / total_output if total_output > 0 else 0,
+            "productivity_ratio": total_output / total_cost if total_cost > 0 else 0
         })
 
     return {"product_id": product.id, "trend_last_batches": trend_data}
@@ -152,7 +164,7 @@ def trend_last_batches(product_id: int, n: int = 3, db: Session = Depends(get_db
 def get_product_fields_and_batches(
     product_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: deps.Principal = Depends(get_current_user)
 ):
     # Fetch product to get its dynamic fields
     product = db.query(models.Product).filter(
@@ -1,17 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from .. import models, schemas, deps
 from ..database import get_db
-from ..core_logic import perform_calculation, get_ai_analysis
+from ..core_logic import perform_calculation, analysis_cache_key, get_ai_analysis
+from .. import ai_cache
 from typing import Dict, Any
 
 router = APIRouter(prefix="/productivity", tags=["Productivity"])
 
 @router.post("/calculate", summary="Calculate Productivity Scores with AI Analysis")
-def calculate_productivity_with_analysis(
+async def calculate_productivity_with_analysis(
     request: schemas.ProductivityCalculationCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.get_current_user)
+    current_user: deps.Principal = Depends(deps.get_current_user)
 ):
     try:
         # Step 1: Perform productivity calculation
@@ -27,21 +29,33 @@ def calculate_productivity_with_analysis(
             "single_productivity": result["single_productivity"]
         }
         
-        ai_result = get_ai_analysis(ai_analysis_data)
+        cache_key = analysis_cache_key(ai_analysis_data, current_user.organization_id)
+        ai_result = await run_in_threadpool(ai_cache.lookup, db, current_user.organization_id, cache_key)
+        if not ai_result or "id" not in ai_result:
+            ai_result = await get_ai_analysis(ai_analysis_data, current_user.organization_id)
+            # Persist it so /ai/analyze and other workers reuse it
+            if "error" not in ai_result:
+                await run_in_threadpool(
+                    ai_cache.persist, db, current_user.organization_id, current_user.id,
+                    ai_analysis_data, ai_result, cache_key
+                )
         
         # Step 3: Save only calculation in DB (original fields)
-        calc = models.ProductivityCalculation(
-            organization_id=current_user.organization_id,
-            user_id=current_user.id,
-            processed_inputs=request.inputs,
-            processed_outputs=request.outputs,
-            combined_productivity=result["combined_productivity"],
-            single_productivity=result["single_productivity"]
-        )
-        
-        db.add(calc)
-        db.commit()
-        db.refresh(calc)
+        def save():
+            calc = models.ProductivityCalculation(
+                organization_id=current_user.organization_id,
+                user_id=current_user.id,
+                processed_inputs=request.inputs,
+                processed_outputs=request.outputs,
+                combined_productivity=result["combined_productivity"],
+                single_productivity=result["single_productivity"]
+            )
+            db.add(calc)
+            db.commit()
+            db.refresh(calc)
+            return calc
+
+        calc = await run_in_threadpool(save)
 
         # Step 4: Combine both results for response
         combined_response = {
@@ -62,6 +76,8 @@ def calculate_productivity_with_analysis(
         
         return combined_response
 
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
\ No newline at end of file
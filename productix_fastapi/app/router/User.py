@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -13,7 +14,7 @@ router = APIRouter(prefix="/users", tags=["Users"])
 @router.get("/", response_model=List[schemas.UserResponse])
 def list_users(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.require_role("org_admin"))
+    current_user: deps.Principal = Depends(deps.require_role("org_admin"))
 ):
     return (
         db.query(models.User)
@@ -24,18 +25,29 @@ def list_users(
 # -------------------------------
 # Create new user (org_admin only)
 # -------------------------------
+def _email_taken(db: Session, email: str) -> bool:
+    return db.query(models.User.id).filter(models.User.email == email).first() is not None
+
+
+def _save_user(db: Session, user: models.User) -> models.User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
 @router.post("/", response_model=schemas.UserResponse)
-def create_user(
+async def create_user(
     user_in: schemas.UserCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.require_role("org_admin"))
+    current_user: deps.Principal = Depends(deps.require_role("org_admin"))
 ):
-    # Prevent duplicate emails
-    existing = db.query(models.User).filter(models.User.email == user_in.email).first()
-    if existing:
+    # Prevent duplicate emails (queries run off the event loop)
+    if await run_in_threadpool(_email_taken, db, user_in.email):
         raise HTTPException(status_code=400, detail="Email already exists")
 
-    hashed = auth.hash_password(user_in.password)
+    # bcrypt runs on the hashing pool
+    hashed = await auth.hash_password_async(user_in.password)
     user = models.User(
         name=user_in.name,
         email=user_in.email,
@@ -43,17 +55,21 @@ def create_user(
         role=user_in.role or "org_user",
         organization_id=current_user.organization_id
     )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+    return await run_in_threadpool(_save_user, db, user)
 
 # -------------------------------
 # Get my profile
 # -------------------------------
 @router.get("/me", response_model=schemas.UserResponse)
-def get_me(current_user: models.User = Depends(deps.get_current_user)):
-    return current_user
+def get_me(
+    db: Session = Depends(get_db),
+    current_user: deps.Principal = Depends(deps.get_current_user)
+):
+    # current_user is the cached principal; the profile needs the full row
+    user = db.query(models.User).filter(models.User.id == current_user.id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
 # -------------------------------
 # Delete user (org_admin only)
@@ -62,7 +78,7 @@ def get_me(current_user: models.User = Depends(deps.get_current_user)):
 def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.require_role("org_admin"))
+    current_user: deps.Principal = Depends(deps.require_role("org_admin"))
 ):
     # Fetch the user in the same organization
     user = (
@@ -90,4 +106,5 @@ def delete_user(
 
     db.delete(user)
     db.commit()
+    deps.invalidate_user(user_id)
     return {"detail": "User deleted successfully"}
@@ -1,42 +1,44 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from ..core_logic import get_ai_agent_report
 from sqlalchemy.orm import Session
 from typing import List, Dict
 from .. import models, schemas, deps
 from ..database import get_db
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
 from fastapi.responses import FileResponse
 import os
 from datetime import datetime
-from reportlab.lib.pagesizes import A4
 
 router = APIRouter(prefix="/agent", tags=["AI Agent"])
 
 @router.post("/", summary="Run AI Agent for Reporting", response_model=schemas.AIReportResponse)
-def run_ai_agent(
+async def run_ai_agent(
     request: schemas.AgentRequest,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.get_current_user)
+    current_user: deps.Principal = Depends(deps.get_current_user)
 ):
     records_dict = request.records  # Already a dict keyed by product_name
 
     # Generate AI report
-    result = get_ai_agent_report(records_dict, request.goal)
+    result = await get_ai_agent_report(records_dict, request.goal)
     if "error" in result:
         raise HTTPException(status_code=500, detail=result["error"])
 
     # Save report in DB
-    report = models.AIReport(
-        organization_id=current_user.organization_id,
-        user_id=current_user.id,
-        goal=request.goal,
-        plan=result.get("plan", ""),
-        report=result.get("report", "")
-    )
-    db.add(report)
-    db.commit()
-    db.refresh(report)
+    def save():
+        report = models.AIReport(
+            organization_id=current_user.organization_id,
+            user_id=current_user.id,
+            goal=request.goal,
+            plan=result.get("plan", ""),
+            report=result.get("report", "")
+        )
+        db.add(report)
+        db.commit()
+        db.refresh(report)
+        return report
+
+    report = await run_in_threadpool(save)
 
     # Return response
     return schemas.AIReportResponse(
@@ -53,7 +55,7 @@ def run_ai_agent(
     
     
 @router.get("/{report_id}/download", summary="Download AI Report as PDF")
-def download_ai_report(report_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(deps.get_current_user)):
+def download_ai_report(report_id: int, db: Session = Depends(get_db), current_user: deps.Principal = Depends(deps.get_current_user)):
     print("✅ Download endpoint hit:", report_id, current_user.id)
 
     report = db.query(models.AIReport).filter_by(id=report_id, user_id=current_user.id).first()
@@ -67,6 +69,9 @@ def download_ai_report(report_id: int, db: Session = Depends(get_db), current_us
     file_path = os.path.join(tmp_dir, f"AI_Report_{report.id}.pdf")
     print("📄 Writing file:", file_path)
 
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.pagesizes import A4
 
     styles = getSampleStyleSheet()
     doc = SimpleDocTemplate(file_path, pagesize=A4)
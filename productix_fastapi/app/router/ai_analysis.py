@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
-from ..core_logic import get_ai_analysis
+from fastapi.concurrency import run_in_threadpool
+from ..core_logic import analysis_cache_key, get_ai_analysis
+from .. import ai_cache
 from sqlalchemy.orm import Session
 from .. import models, schemas, deps
 from ..database import get_db
@@ -7,27 +9,23 @@ from ..database import get_db
 router = APIRouter(prefix="/ai", tags=["AI Analysis"])
 
 @router.post("/analyze", summary="Get Structured AI Analysis", response_model=schemas.AIAnalysisResponse)
-def analyze_calculation(
+async def analyze_calculation(
     request: schemas.AIAnalysisCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.get_current_user)
+    current_user: deps.Principal = Depends(deps.get_current_user)
 ):
-    # Perform AI analysis
-    result = get_ai_analysis(request.dict())
+    # Same data analyzed recently: return the stored analysis (memory tier first)
+    cache_key = analysis_cache_key(request.dict(), current_user.organization_id)
+    cached = await run_in_threadpool(ai_cache.lookup, db, current_user.organization_id, cache_key)
+    if cached and "id" in cached:
+        return cached
+
+    # Perform AI analysis (an unsaved cached analysis is reused by get_ai_analysis)
+    result = await get_ai_analysis(request.dict(), current_user.organization_id)
     if "error" in result:
         raise HTTPException(status_code=500, detail=result["error"])
 
     # Save output in DB
-    analysis = models.AIAnalysis(
-        organization_id=current_user.organization_id,
-        user_id=current_user.id,
-        request_data=request.dict(),
-        efficiency_score=result.get("efficiency_score"),
-        ai_prediction=result.get("ai_prediction"),
-        top_inefficiencies=result.get("top_inefficiencies"),
-        ai_prescriptions=result.get("ai_prescriptions")
+    return await run_in_threadpool(
+        ai_cache.persist, db, current_user.organization_id, current_user.id, request.dict(), result, cache_key
     )
-    db.add(analysis)
-    db.commit()
-    db.refresh(analysis)
-    return analysis
\ No newline at end of file
@@ -1,88 +1,153 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import Dict, List
+from typing import Dict, List, Optional
 from ..database import get_db
-from ..models import AIAnalysis, Product, Batch, ShiftEntry, User
-from ..deps import get_current_user
-from ..schemas import AnalysisCountResponse, ProductivityRecordsResponse, ProductRecord
+from ..models import AIAnalysis, Product, Batch, ShiftEntry, ShiftLineItem
+from ..deps import Principal, get_current_user
+from ..schemas import AnalysisCountResponse, MaterialUsage, ProductivityRecordsResponse, ProductRecord
+from ..streaming import ndjson_response
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
+def _build_record(shift_id, shift_date, inputs, outputs) -> ProductRecord:
+    """Calculates combined and single productivity for one shift entry."""
+    inputs = inputs or {}
+    outputs = outputs or {}
+
+    combined_productivity = None
+    single_productivity = {}
+
+    # Example: Combined productivity = sum(outputs.values()) / sum(inputs.values()) * 100
+    try:
+        total_input = sum(float(v) for v in inputs.values())
+        total_output = sum(float(v) for v in outputs.values())
+        if total_input > 0:
+            combined_productivity = round((total_output / total_input) * 100, 2)
+    except Exception:
+        combined_productivity = None
+
+    # Single productivity: input_key / output_key ratios
+    for input_key, input_val in inputs.items():
+        for output_key, output_val in outputs.items():
+            try:
+                ratio = (float(output_val) / float(input_val)) * 100
+                single_productivity[f"{input_key} / {output_key}"] = round(ratio, 2)
+            except Exception:
+                single_productivity[f"{input_key} / {output_key}"] = None
+
+    return ProductRecord(
+        calculation_id=shift_id,
+        date=shift_date.isoformat() if shift_date else None,
+        inputs=inputs,
+        outputs=outputs,
+        combined_productivity=combined_productivity,
+        single_productivity=single_productivity
+    )
+
+
+def _productivity_query(
+    db: Session,
+    organization_id: int,
+    product_id: Optional[int],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    cursor: Optional[int],
+):
+    """One joined query over shifts with their product name, ordered by shift id."""
+    query = (
+        db.query(
+            ShiftEntry.id,
+            ShiftEntry.date,
+            ShiftEntry.input_materials,
+            ShiftEntry.output_products,
+            Product.name,
+        )
+        .join(Batch, ShiftEntry.batch_id == Batch.id)
+        .join(Product, Batch.product_id == Product.id)
+        .filter(
+            ShiftEntry.organization_id == organization_id,
+            Batch.organization_id == organization_id,
+        )
+    )
+    if product_id is not None:
+        query = query.filter(Product.id == product_id)
+    if start_date is not None:
+        query = query.filter(ShiftEntry.date >= start_date)
+    if end_date is not None:
+        query = query.filter(ShiftEntry.date <= end_date)
+    if cursor is not None:
+        query = query.filter(ShiftEntry.id > cursor)
+    return query.order_by(ShiftEntry.id)
+
+
 @router.get(
     "/productivity-records",
     summary="Fetch productivity records for logged-in tenant",
     response_model=ProductivityRecordsResponse
 )
 def get_productivity_records(
+    response: Response,
+    product_id: Optional[int] = Query(None, description="Only records of this product"),
+    start_date: Optional[date] = Query(None, description="Earliest shift date (inclusive)"),
+    end_date: Optional[date] = Query(None, description="Latest shift date (inclusive)"),
+    cursor: Optional[int] = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=5000, description="Page size; omit for all records"),
+    stream: bool = Query(False, description="Stream records as NDJSON, one per line"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ) -> Dict[str, List[ProductRecord]]:
     """
-    Returns all productivity records for the current user's tenant.
-    Fetches products, their batches, and shift entries.
+    Returns productivity records for the current user's tenant.
+    Shift entries are read with their product in one joined query and
+    grouped by product name in memory.
     Calculates combined and single productivity for each shift entry.
     Output format is a dictionary keyed by product name.
+    When `limit` is given, the id to pass as `cursor` for the next page is
+    returned in the X-Next-Cursor header (absent on the last page).
+    With `stream=true` the records are written as newline-delimited JSON,
+    each carrying its product name, without building the whole result.
     """
+    org_id = current_user.organization_id
+
+    if stream:
+        def build_query(session: Session):
+            query = _productivity_query(session, org_id, product_id, start_date, end_date, cursor)
+            return query.limit(limit) if limit is not None else query
+
+        return ndjson_response(
+            build_query,
+            lambda row: {"product": row.name, **_build_record(*row[:4]).model_dump()},
+        )
+
     records_dict: Dict[str, List[ProductRecord]] = {}
 
-    # Fetch all products for this organization
-    products = db.query(Product).filter(
-        Product.organization_id == current_user.organization_id
-    ).all()
-
-    for product in products:
-        records_dict[product.name] = []
-
-        # Fetch all batches for this product
-        batches = db.query(Batch).filter(
-            Batch.organization_id == current_user.organization_id,
-            Batch.product_id == product.id
-        ).all()
-
-        for batch in batches:
-            # Fetch all shift entries for this batch
-            shifts = db.query(ShiftEntry).filter(
-                ShiftEntry.organization_id == current_user.organization_id,
-                ShiftEntry.batch_id == batch.id
-            ).all()
-
-            for shift in shifts:
-                # Calculate combined and single productivity
-                inputs = shift.input_materials or {}
-                outputs = shift.output_products or {}
-
-                combined_productivity = None
-                single_productivity = {}
-
-                # Example: Combined productivity = sum(outputs.values()) / sum(inputs.values()) * 100
-                try:
-                    total_input = sum(float(v) for v in inputs.values())
-                    total_output = sum(float(v) for v in outputs.values())
-                    if total_input > 0:
-                        combined_productivity = round((total_output / total_input) * 100, 2)
-                except Exception:
-                    combined_productivity = None
-
-                # Single productivity: input_key / output_key ratios
-                for input_key, input_val in inputs.items():
-                    for output_key, output_val in outputs.items():
-                        try:
-                            ratio = (float(output_val) / float(input_val)) * 100
-                            single_productivity[f"{input_key} / {output_key}"] = round(ratio, 2)
-                        except Exception:
-                            single_productivity[f"{input_key} / {output_key}"] = None
-
-                combined_record = ProductRecord(
-                    calculation_id=shift.id,
-                    date=shift.date.isoformat() if shift.date else None,
-                    inputs=inputs,
-                    outputs=outputs,
-                    combined_productivity=combined_productivity,
-                    single_productivity=single_productivity
-                )
-                records_dict[product.name].append(combined_record)
-
-    return  records_dict
+    # Products without shifts still show up (first page only)
+    if cursor is None:
+        product_names = db.query(Product.name).filter(Product.organization_id == org_id)
+        if product_id is not None:
+            product_names = product_names.filter(Product.id == product_id)
+        for (name,) in product_names.order_by(Product.id):
+            records_dict[name] = []
+
+    query = _productivity_query(db, org_id, product_id, start_date, end_date, cursor)
+    if limit is not None:
+        query = query.limit(limit)
+
+    last_id = None
+    rows = 0
+    for shift_id, shift_date, inputs, outputs, product_name in query:
+        records_dict.setdefault(product_name, []).append(
+            _build_record(shift_id, shift_date, inputs, outputs)
+        )
+        last_id = shift_id
+        rows += 1
+
+    if limit is not None and rows == limit:
+        response.headers["X-Next-Cursor"] = str(last_id)
+
+    return records_dict
 
 
 @router.get(
@@ -92,7 +157,7 @@ def get_productivity_records(
 )
 def get_analysis_count(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Returns the total number of AI analysis records for the current user's tenant.
@@ -100,4 +165,69 @@ def get_analysis_count(
     count = db.query(AIAnalysis).filter(
         AIAnalysis.organization_id == current_user.organization_id
     ).count()
-    return {"analysis_count": count}
\ No newline at end of file
+    return {"analysis_count": count}
+
+
+def _period_expr(db: Session, period: str):
+    """Date bucket of a line item as text: YYYY-MM or YYYY-MM-DD."""
+    if period == "day":
+        return ShiftLineItem.date
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(ShiftLineItem.date, "YYYY-MM")
+    return func.strftime("%Y-%m", ShiftLineItem.date)
+
+
+@router.get(
+    "/materials",
+    summary="Material usage totals for tenant",
+    response_model=List[MaterialUsage]
+)
+def get_material_usage(
+    kind: Optional[str] = Query(None, pattern="^(input|output)$", description="Only inputs or only outputs"),
+    field_name: Optional[str] = Query(None, description="Only this material / output field"),
+    start_date: Optional[date] = Query(None, description="Earliest shift date (inclusive)"),
+    end_date: Optional[date] = Query(None, description="Latest shift date (inclusive)"),
+    period: str = Query("month", pattern="^(month|day|all)$", description="Group by month, day or the whole range"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Returns amount and cost per material (and per month or day) for the
+    current user's tenant, e.g. total steel used per month or the average
+    unit price paid per input. One GROUP BY query over shift line items.
+    """
+    cost = func.sum(ShiftLineItem.amount * func.coalesce(ShiftLineItem.unit_price, 0))
+    columns = [ShiftLineItem.field_name, ShiftLineItem.kind]
+    if period != "all":
+        columns.append(_period_expr(db, period).label("period"))
+
+    query = db.query(
+        *columns,
+        func.sum(ShiftLineItem.amount).label("amount"),
+        cost.label("cost"),
+        func.count(ShiftLineItem.id).label("entries"),
+    ).filter(ShiftLineItem.organization_id == current_user.organization_id)
+    if kind is not None:
+        query = query.filter(ShiftLineItem.kind == kind)
+    if field_name is not None:
+        query = query.filter(ShiftLineItem.field_name == field_name)
+    if start_date is not None:
+        query = query.filter(ShiftLineItem.date >= start_date)
+    if end_date is not None:
+        query = query.filter(ShiftLineItem.date <= end_date)
+    query = query.group_by(*columns).order_by(*columns)
+
+    usage = []
+    for row in query:
+        amount = float(row.amount or 0)
+        total_cost = float(row.cost or 0)
+        usage.append(MaterialUsage(
+            field_name=row.field_name,
+            kind=row.kind,
+            period=str(row.period) if period != "all" else None,
+            amount=amount,
+            cost=total_cost,
+            entries=row.entries,
+            cost_per_unit=round(total_cost / amount, 4) if row.kind == "input" and amount else None,
+        ))
+    return usage
@@ -1,27 +1,33 @@
 from sqlalchemy.orm import joinedload
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import datetime
 
 from ..database import get_db
 from ..models import User, UserRole
 from ..schemas import LoginSchema, TokenSchema
-from ..auth import verify_password, create_access_token
+from ..auth import verify_password_async, create_access_token
 
 router = APIRouter()
 
-@router.post("/login/login", response_model=TokenSchema, summary="User Login with JWT")
-async def login(credentials: LoginSchema, db: Session = Depends(get_db)):
-    # Fetch user along with organization
-    user = (
+
+def _load_user(db: Session, email: str):
+    return (
         db.query(User)
         .options(joinedload(User.organization))
-        .filter(User.email == credentials.email)
+        .filter(User.email == email)
         .first()
     )
 
-    # Verify user existence and password
-    if not user or not verify_password(credentials.password, user.password_hash):
+
+@router.post("/login/login", response_model=TokenSchema, summary="User Login with JWT")
+async def login(credentials: LoginSchema, db: Session = Depends(get_db)):
+    # Fetch user along with organization (off the event loop)
+    user = await run_in_threadpool(_load_user, db, credentials.email)
+
+    # Verify user existence and password (bcrypt runs on the hashing pool)
+    if not user or not await verify_password_async(credentials.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
@@ -12,7 +12,7 @@ router = APIRouter(prefix="/organizations", tags=["Organizations"])
 @router.get("/me", response_model=schemas.OrganizationResponse)
 def get_my_org(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.get_current_user)
+    current_user: deps.Principal = Depends(deps.get_current_user)
 ):
     org = db.query(models.Organization).filter(models.Organization.id == current_user.organization_id).first()
     if not org:
@@ -27,7 +27,7 @@ def get_my_org(
 def update_my_org(
     org_in: schemas.OrganizationBase,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.require_role("org_admin"))
+    current_user: deps.Principal = Depends(deps.require_role("org_admin"))
 ):
     org = db.query(models.Organization).filter(models.Organization.id == current_user.organization_id).first()
     if not org:
@@ -48,7 +48,7 @@ def update_my_org(
 @router.get("/", response_model=List[schemas.OrganizationResponse])
 def list_orgs(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.require_role("superadmin"))
+    current_user: deps.Principal = Depends(deps.require_role("superadmin"))
 ):
     return db.query(models.Organization).all()
 
@@ -60,7 +60,7 @@ def list_orgs(
 def get_org(
     org_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.require_role("superadmin"))
+    current_user: deps.Principal = Depends(deps.require_role("superadmin"))
 ):
     org = db.query(models.Organization).filter(models.Organization.id == org_id).first()
     if not org:
@@ -75,7 +75,7 @@ def get_org(
 def delete_org(
     org_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.require_role("superadmin"))
+    current_user: deps.Principal = Depends(deps.require_role("superadmin"))
 ):
     org = db.query(models.Organization).filter(models.Organization.id == org_id).first()
     if not org:
@@ -83,4 +83,5 @@ def delete_org(
 
     db.delete(org)
     db.commit()
+    deps.invalidate_organization(org_id)
     return {"detail": "Organization deleted"}
@@ -1,11 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from .. import models, schemas, database
-from ..deps import get_current_user
+from ..deps import Principal, get_current_user
+from ..metrics import apply_shift_totals
+from ..rollups import apply_shift_change, contribution
+from ..streaming import ndjson_response
+from .. import line_items, vector_index
 
 router = APIRouter(prefix="/shifts", tags=["Shifts"])
 
 
+def _flush_shift(db: Session):
+    # (batch_id, date, shift_no) is unique
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="A shift entry for this batch, date and shift already exists")
+
+
 def decimals_to_float(obj):
     if isinstance(obj, list):
         return [decimals_to_float(i) for i in obj]
@@ -21,7 +35,7 @@ def decimals_to_float(obj):
 def create_shift_entry(
     entry: schemas.ShiftEntryCreate,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     # Convert decimals to floats
     entry_data = entry.dict()
@@ -34,17 +48,32 @@ def create_shift_entry(
         organization_id=current_user.organization_id,
         **entry_data
     )
+    apply_shift_totals(db_entry)
     db.add(db_entry)
+    _flush_shift(db)
+    line_items.sync_shift(db, db_entry)
+    apply_shift_change(db, current_user.organization_id, new=contribution(db_entry))
     db.commit()
     db.refresh(db_entry)
+    vector_index.index_shift(db, current_user.organization_id, db_entry.id)
     return db_entry
 
 
 @router.get("/", response_model=list[schemas.ShiftEntryOut])
 def list_shift_entries(
+    stream: bool = Query(False, description="Stream entries as NDJSON, one per line"),
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
+    if stream:
+        org_id = current_user.organization_id
+        return ndjson_response(
+            lambda session: session.query(models.ShiftEntry)
+            .filter(models.ShiftEntry.organization_id == org_id)
+            .order_by(models.ShiftEntry.id),
+            lambda entry: schemas.ShiftEntryOut.model_validate(entry, from_attributes=True).model_dump(mode="json"),
+        )
+
     return db.query(models.ShiftEntry).filter(
         models.ShiftEntry.organization_id == current_user.organization_id
     ).all()
@@ -54,7 +83,7 @@ def list_shift_entries(
 def get_shift_entry(
     shift_id: int,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     entry = db.query(models.ShiftEntry).filter(
         models.ShiftEntry.id == shift_id,
@@ -70,7 +99,7 @@ def update_shift_entry(
     shift_id: int,
     entry_update: schemas.ShiftEntryUpdate,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     entry = db.query(models.ShiftEntry).filter(
         models.ShiftEntry.id == shift_id,
@@ -85,11 +114,18 @@ def update_shift_entry(
     if update_data.get("output_products"):
         update_data["output_products"] = decimals_to_float(update_data["output_products"])
 
+    old = contribution(entry)
     for key, value in update_data.items():
         setattr(entry, key, value)
+    apply_shift_totals(entry)
+    entry.import_hash = None  # edited by hand; the next import must not skip it
+    _flush_shift(db)
+    line_items.sync_shift(db, entry)
+    apply_shift_change(db, current_user.organization_id, old=old, new=contribution(entry))
 
     db.commit()
     db.refresh(entry)
+    vector_index.index_shift(db, current_user.organization_id, entry.id)
     return entry
 
 
@@ -97,7 +133,7 @@ def update_shift_entry(
 def delete_shift_entry(
     shift_id: int,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     entry = db.query(models.ShiftEntry).filter(
         models.ShiftEntry.id == shift_id,
@@ -106,8 +142,13 @@ def delete_shift_entry(
     if not entry:
         raise HTTPException(status_code=404, detail="Shift entry not found")
 
+    old = contribution(entry)
+    line_items.delete_line_items(db, [entry.id])
     db.delete(entry)
+    db.flush()
+    apply_shift_change(db, current_user.organization_id, old=old)
     db.commit()
+    vector_index.remove_document(current_user.organization_id, "shifts", shift_id)
     return {"detail": "Shift entry deleted successfully"}
 
 
@@ -115,7 +156,7 @@ def delete_shift_entry(
 def get_product_fields(
     product_id: int,
     db: Session = Depends(database.get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     product = db.query(models.Product).filter(
         models.Product.id == product_id,
@@ -2,18 +2,20 @@
 
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List
-from ..database import get_db
+from ..database import get_db, pool_metrics
 from ..models import Organization, Subscription, User
 from ..schemas import (
     OrganizationResponse,
     OrganizationBase,
+    PoolMetricsResponse,
     UserResponse,
     UserCreate
 )
-from ..deps import require_system_admin
-from ..auth import hash_password
+from ..deps import invalidate_organization, invalidate_user, require_system_admin
+from ..auth import hash_password_async
 
 router = APIRouter(prefix="/system-admin", tags=["System Admin"])
 
@@ -68,6 +70,7 @@ def delete_organization(
 
     db.delete(org)
     db.commit()
+    invalidate_organization(org_id)
     return {"detail": "Organization deleted"}
 
 
@@ -79,31 +82,40 @@ def list_all_users(db: Session = Depends(get_db), admin=Depends(require_system_a
     return db.query(User).all()
 
 
-@router.post("/organizations/{org_id}/users", response_model=UserResponse)
-def create_org_user(
-    org_id: int,
-    user_in: UserCreate,   # contains email, password, role
-    db: Session = Depends(get_db),
-    admin=Depends(require_system_admin)
-):
+def _check_new_org_user(db: Session, org_id: int, email: str):
     org = db.query(Organization).filter(Organization.id == org_id).first()
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
 
-    existing_user = db.query(User).filter(User.email == user_in.email).first()
+    existing_user = db.query(User).filter(User.email == email).first()
     if existing_user:
         raise HTTPException(status_code=400, detail="User with this email already exists")
 
+
+def _save_user(db: Session, user: User) -> User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@router.post("/organizations/{org_id}/users", response_model=UserResponse)
+async def create_org_user(
+    org_id: int,
+    user_in: UserCreate,   # contains email, password, role
+    db: Session = Depends(get_db),
+    admin=Depends(require_system_admin)
+):
+    # Queries run off the event loop, bcrypt on the hashing pool
+    await run_in_threadpool(_check_new_org_user, db, org_id, user_in.email)
+
     new_user = User(
         email=user_in.email,
-        password_hash=hash_password(user_in.password),
+        password_hash=await hash_password_async(user_in.password),
         role=user_in.role,
         organization_id=org_id,
     )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+    return await run_in_threadpool(_save_user, db, new_user)
 
 @router.delete("/users/{user_id}")
 def delete_user(user_id: int, db: Session = Depends(get_db), admin=Depends(require_system_admin)):
@@ -113,6 +125,7 @@ def delete_user(user_id: int, db: Session = Depends(get_db), admin=Depends(requi
 
     db.delete(user)
     db.commit()
+    invalidate_user(user_id)
     return {"detail": "User deleted"}
 
 
@@ -147,6 +160,7 @@ def cancel_subscription(org_id: int, db: Session = Depends(get_db)):
     db.add(org)
     db.commit()
     db.refresh(org)
+    invalidate_organization(org_id)
     return {"subscription": {"status": org.subscription.status}, "org_status": org.status}
 
 
@@ -173,5 +187,15 @@ def enable_subscription(org_id: int, db: Session = Depends(get_db)):
     db.add(org)
     db.commit()
     db.refresh(org)
+    invalidate_organization(org_id)
     return {"subscription": {"status": org.subscription.status}, "org_status": org.status}
 
+
+
+# ------------------------------------------------
+# Database
+# ------------------------------------------------
+@router.get("/db-pool", response_model=PoolMetricsResponse)
+def db_pool_metrics(admin=Depends(require_system_admin)):
+    """Connection pool usage (checked out, overflow) and checkout wait times."""
+    return pool_metrics()
@@ -3,9 +3,9 @@ import io
 from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
 from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-import pandas as pd
-import uuid, hashlib, os
-from typing import Optional
+import uuid, hashlib, os, shutil, socket
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Optional
 from ..deps import get_db, get_current_user
 from .. import models  # your SQLAlchemy models
 
@@ -16,15 +16,18 @@ import json
 import hashlib
 from datetime import date
 
-import pandas as pd
 from fastapi import APIRouter, File, UploadFile, Depends, HTTPException, Form
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment
 
-from .. import models
- # adjust import if different
+from .. import models, schemas
+from ..database import SessionLocal
+from ..rollups import rebuild_batch_rollups
+from .. import vector_index
+# pandas and openpyxl (via app.importer / app.sheet_reader) are imported
+# inside the functions that use them, so worker startup does not pay for them
+if TYPE_CHECKING:
+    import pandas as pd
 
 router = APIRouter(prefix="/api/v1/uploads", tags=["uploads"])
 
@@ -32,22 +35,13 @@ UPLOAD_DIR = "/tmp/uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
-# ---------------------------------------------------------------------
-# Utility
-# ---------------------------------------------------------------------
-def compute_import_hash(file_id: str, row_index: int) -> str:
-    """Generate a hash for each row (optional helper)."""
-    return hashlib.sha256(f"{file_id}:{row_index}".encode()).hexdigest()
-
-
 # ---------------------------------------------------------------------
 # Validation
 # ---------------------------------------------------------------------
-def validate_workbook(sheets: dict):
+def validate_workbook(sheets: dict, required_sheets=("Products", "Batches", "ShiftEntries")):
     errors = []
     warnings = []
 
-    required_sheets = ["Products", "Batches", "ShiftEntries"]
     for sheet in required_sheets:
         if sheet not in sheets:
             errors.append(f"Missing required sheet: {sheet}")
@@ -77,311 +71,407 @@ def validate_workbook(sheets: dict):
 # Processor
 # ---------------------------------------------------------------------
 import json
+from sqlalchemy import func, select
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
 
-def process_workbook(db: Session, organization_id: int, file_id: str, sheets: dict, replace_mode: str):
-    """Process Excel workbook into DB with validation and logging."""
-
-    batches_df = sheets.get("Batches")
-    shifts_df = sheets.get("ShiftEntries")
 
-    if batches_df is None or shifts_df is None:
-        raise HTTPException(400, "Missing required sheets (Batches or ShiftEntries)")
+def import_products(db: Session, organization_id: int, products_df: "pd.DataFrame") -> dict:
+    """Creates or updates products; returns a map of normalized name -> product."""
+    product_map = {}
+    existing_products = db.query(models.Product).filter_by(
+        organization_id=organization_id
+    ).all()
+    for p in existing_products:
+        product_map[p.name.strip().lower()] = p
 
-    # --- Clean NaNs ---
-    batches_df = batches_df.fillna("")
-    shifts_df = shifts_df.fillna("")
+    for row in products_df.to_dict("records"):
+        name_norm = row["name"].strip().lower()
+        product = product_map.get(name_norm)
 
-    batches_created = 0
-    shifts_created = 0
-    errors = []
-
-    print("📘 Starting Excel import...")
-    print(f"Total batches: {len(batches_df)}, Total shifts: {len(shifts_df)}")
-
-    for _, batch_row in batches_df.iterrows():
+        input_fields = []
+        output_fields = []
         try:
-            product_name = str(batch_row["product_name"]).strip()
-            batch_number = str(batch_row["batch_number"]).strip()
-
-            if not product_name or not batch_number:
-                errors.append(f"Missing product_name or batch_number in batch row: {batch_row.to_dict()}")
-                continue
-
-            print(f"➡️ Processing batch: {batch_number} ({product_name})")
-
-            # --- Find or create product ---
-            product = db.query(models.Product).filter_by(
-                name=product_name,
+            if row.get("input_fields"):
+                input_fields = json.loads(row["input_fields"]) if isinstance(row["input_fields"], str) else row["input_fields"]
+            if row.get("output_fields"):
+                output_fields = json.loads(row["output_fields"]) if isinstance(row["output_fields"], str) else row["output_fields"]
+        except Exception:
+            pass
+
+        if product:
+            # Update existing product
+            product.description = row.get("description", product.description)
+            product.input_fields = input_fields
+            product.output_fields = output_fields
+        else:
+            # Create new product
+            product = models.Product(
+                name=row["name"].strip(),
+                description=row.get("description", ""),
+                input_fields=input_fields,
+                output_fields=output_fields,
                 organization_id=organization_id
-            ).first()
-
-            if not product:
-                print(f"🆕 Creating new product: {product_name}")
-                product = models.Product(
-                    name=product_name,
-                    organization_id=organization_id,
-                    description=batch_row.get("description", ""),
-                    input_fields={},
-                    output_fields={}
-                )
-                db.add(product)
-                db.commit()
-                db.refresh(product)
-
-            # --- Find or create batch ---
-            batch = db.query(models.Batch).filter_by(
-                batch_number=batch_number,
-                organization_id=organization_id
-            ).first()
-
-            if not batch:
-                batch = models.Batch(
-                    batch_number=batch_number,
-                    organization_id=organization_id,
-                    product_id=product.id,
-                    start_date=batch_row.get("start_date") or datetime.utcnow().date(),
-                    end_date=batch_row.get("end_date") or None,
-                    status=str(batch_row.get("status", "open")).lower()
-                )
-                db.add(batch)
-                db.commit()
-                db.refresh(batch)
-                batches_created += 1
-                print(f"✅ Created batch: {batch_number}")
-            else:
-                print(f"↩️ Using existing batch: {batch_number}")
-
-            # --- Process shifts for this batch ---
-            batch_shifts = shifts_df[shifts_df["batch_number"] == batch_number]
-            if batch_shifts.empty:
-                print(f"⚠️ No shift entries found for batch {batch_number}")
-                continue
-
-            for _, shift_row in batch_shifts.iterrows():
-                try:
-                    # Parse JSON safely
-                    def safe_json(value):
-                        if not value or pd.isna(value): 
-                            return {}
-                        if isinstance(value, dict):
-                            return value
-                        if isinstance(value, str):
-                            try:
-                                return json.loads(value)
-                            except json.JSONDecodeError:
-                                print(f"⚠️ Invalid JSON: {value}")
-                                return {}
-                        return {}
-
-                    input_parsed = safe_json(shift_row.get("input_materials"))
-                    output_parsed = safe_json(shift_row.get("output_products"))
-
-                    date_str = shift_row.get("date")
-                    shift_date = None
-                    try:
-                        shift_date = pd.to_datetime(date_str).date() if date_str else datetime.utcnow().date()
-                    except Exception:
-                        shift_date = datetime.utcnow().date()
-
-                    shift_entry = models.ShiftEntry(
-                        batch_id=batch.id,
-                        date=shift_date,
-                        shift_no=str(shift_row.get("shift_no", "Morning")),
-                        organization_id=organization_id,
-                        input_materials=input_parsed,
-                        output_products=output_parsed,
-                        admin_notes=str(shift_row.get("admin_notes", ""))
-                    )
-                    db.add(shift_entry)
-                    shifts_created += 1
-                except Exception as shift_err:
-                    err_msg = f"Shift insert failed for batch {batch_number}: {shift_err}"
-                    print("❌", err_msg)
-                    errors.append(err_msg)
-                    db.rollback()
-
-            db.commit()
+            )
+            db.add(product)
+            db.flush()  # assign ID without committing
+            product_map[name_norm] = product
+
+    db.commit()
+    return product_map
+
+
+def import_batches(db: Session, organization_id: int, batches_df: "pd.DataFrame", product_map: dict) -> int:
+    """Creates or updates batches in one pass; returns the number created."""
+    from ..importer import coerce_date
+
+    # Existing batches of this organization, resolved in one query
+    batch_numbers = {str(n) for n in batches_df["batch_number"] if n}
+    batch_map = {
+        b.batch_number: b
+        for b in db.query(models.Batch).filter(
+            models.Batch.organization_id == organization_id,
+            models.Batch.batch_number.in_(batch_numbers)
+        )
+    }
 
-        except SQLAlchemyError as db_err:
-            db.rollback()
-            err_msg = f"DB error for batch {batch_row.get('batch_number')}: {db_err}"
-            print("❌", err_msg)
-            errors.append(err_msg)
-        except Exception as e:
-            db.rollback()
-            err_msg = f"Unexpected error: {e}"
-            print("❌", err_msg)
-            errors.append(err_msg)
+    new_batches = []
+    for row in batches_df.to_dict("records"):
+        prod_name_norm = row["product_name"].strip().lower()
+        product = product_map.get(prod_name_norm)
+        if not product:
+            print(f"⚠️ Product not found for batch: {row['batch_number']}")
+            continue
+        start_date = coerce_date(row.get("start_date"))
+        end_date = coerce_date(row.get("end_date"))
+        batch = batch_map.get(str(row["batch_number"]))
+        if batch:
+            batch.start_date = start_date or batch.start_date
+            batch.end_date = end_date or batch.end_date
+            batch.status = row.get("status") or batch.status
+        else:
+            batch = models.Batch(
+                organization_id=organization_id,
+                product_id=product.id,
+                batch_number=str(row["batch_number"]),
+                start_date=start_date or date.today(),
+                end_date=end_date,
+                status=row.get("status") or "open"
+            )
+            batch_map[batch.batch_number] = batch
+            new_batches.append(batch)
+
+    db.add_all(new_batches)
+    db.commit()
+    return len(new_batches)
+
+
+def _as_frame(sheet) -> Optional["pd.DataFrame"]:
+    """Materializes a small sheet given either a DataFrame or an iterator of chunks."""
+    import pandas as pd
+    from ..sheet_reader import concat_chunks
+
+    if sheet is None or isinstance(sheet, pd.DataFrame):
+        return sheet
+    return concat_chunks(sheet)
+
+
+def process_workbook(
+    db: Session,
+    organization_id: int,
+    file_id: str,
+    sheets: dict,
+    replace_mode: str = "upsert",
+    progress: Optional[Callable[[dict], None]] = None,
+):
+    """
+    Imports the Products, Batches and ShiftEntries sheets of a workbook.
+
+    Each sheet may be a DataFrame or an iterator of DataFrame chunks (see
+    app.sheet_reader). Products and batches are small and read whole;
+    shift entries are consumed chunk by chunk. Products and batches are
+    upserted by name / batch number, shift entries by (batch_number, date,
+    shift_no) through the bulk importer. Batches are optional for
+    ShiftEntries-only (CSV / NDJSON) files. `progress` is called with the
+    running counters after every step.
+    """
+    from ..importer import resolve_batch_ids, upsert_shift_entries
+
+    products_df = _as_frame(sheets.get("Products"))
+    batches_df = _as_frame(sheets.get("Batches"))
+    shifts = sheets.get("ShiftEntries")
+
+    if shifts is None:
+        raise HTTPException(400, "Missing required sheet (ShiftEntries)")
+
+    counters = {"rows_processed": 0, "batches_created": 0, "shifts_created": 0}
+
+    def report():
+        if progress:
+            progress(dict(counters))
+
+    print(f"📘 Starting import {file_id} ({replace_mode})")
+
+    if batches_df is not None:
+        if products_df is not None:
+            product_map = import_products(db, organization_id, products_df.fillna(""))
+        else:
+            product_map = {
+                p.name.strip().lower(): p
+                for p in db.query(models.Product).filter_by(organization_id=organization_id)
+            }
+        counters["batches_created"] = import_batches(db, organization_id, batches_df.fillna(""), product_map)
+    elif products_df is not None:
+        import_products(db, organization_id, products_df.fillna(""))
+    report()
+
+    # --- Shift entries (bulk, chunked) ---
+    def on_chunk(chunk_result):
+        counters["rows_processed"] += chunk_result["rows"]
+        counters["shifts_created"] += chunk_result["created"]
+        report()
+
+    result = upsert_shift_entries(db, organization_id, shifts, on_chunk=on_chunk)
+
+    # Refresh the report rollups of every batch that received shifts
+    rebuild_batch_rollups(db, organization_id, result["batch_ids"])
+    db.commit()
+
+    # Embed only what this import wrote; the rest of the index stays valid
+    if products_df is not None:
+        names = {str(n).strip().lower() for n in products_df["name"] if n}
+        product_ids = db.scalars(
+            select(models.Product.id).where(
+                models.Product.organization_id == organization_id,
+                func.lower(models.Product.name).in_(names),
+            )
+        ).all()
+        vector_index.index_documents(db, organization_id, "products", product_ids)
+    if batches_df is not None:
+        batch_numbers = {str(n) for n in batches_df["batch_number"] if n}
+        vector_index.index_documents(db, organization_id, "batches",
+                                     resolve_batch_ids(db, organization_id, batch_numbers).values())
+    vector_index.index_documents(db, organization_id, "shifts", result["shift_ids"])
 
-    print(f"✅ Import done: {batches_created} batches, {shifts_created} shifts created")
+    print(f"✅ Import done: {counters['batches_created']} batches, "
+          f"{result['shifts_created']} shifts created, {result['shifts_updated']} updated, "
+          f"{result['shifts_unchanged']} unchanged")
 
     return {
-        "status": "completed_with_warnings" if errors else "completed",
-        "batches_created": batches_created,
-        "shifts_created": shifts_created,
-        "errors": errors
+        "status": "completed_with_warnings" if result["errors"] else "completed",
+        "batches_created": counters["batches_created"],
+        "shifts_created": result["shifts_created"],
+        "shifts_updated": result["shifts_updated"],
+        "shifts_unchanged": result["shifts_unchanged"],
+        "errors": result["errors"]
     }
 
 
-
 # ---------------------------------------------------------------------
-# Excel Upload Endpoint
+# Background import jobs
 # ---------------------------------------------------------------------
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "2"))
+_import_executor = ThreadPoolExecutor(max_workers=IMPORT_WORKERS, thread_name_prefix="excel-import")
 
+# Jobs only live in this process's executor, so every FileUpload records the
+# process that owns it. The boot token tells a restarted process (same host
+# and pid, e.g. pid 1 in a container) apart from the one that died.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+UNFINISHED_STATUSES = ("uploaded", "validating", "processing")
 
 
-
-@router.post("/excel")
-async def upload_excel(
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    user = Depends(get_current_user)
-):
+def _remove_upload_file(path: str):
     try:
-        # --- Step 1: Load Excel file ---
-        df_dict = pd.read_excel(file.file, sheet_name=None)
-        expected_sheets = ["Products", "Batches", "ShiftEntries"]
-        found_sheets = list(df_dict.keys())
-        print(f"✅ SHEETS FOUND: {found_sheets}")
-
-        for sheet in expected_sheets:
-            if sheet not in df_dict:
-                return JSONResponse(
-                    status_code=400,
-                    content={"error": f"Missing required sheet: {sheet}"}
-                )
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"⚠️ Could not delete upload file {path}:", e)
+
+
+def _worker_alive(worker_id: Optional[str]) -> bool:
+    """True unless worker_id names a process of this host that no longer runs."""
+    if not worker_id:
+        return False
+    host, _, rest = worker_id.partition(":")
+    pid, _, boot = rest.partition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return True  # another host's job; its file is not here either
+    if int(pid) == os.getpid():
+        return worker_id == WORKER_ID
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
 
-        # --- Step 2: Upload Products ---
-        products_df = df_dict["Products"].fillna("")
-        print(f"📦 Products sheet rows: {len(products_df)}")
 
-        # Build a product map: normalized name -> product
-        product_map = {}
-        existing_products = db.query(models.Product).filter_by(
-            organization_id=user.organization_id
-        ).all()
-        for p in existing_products:
-            product_map[p.name.strip().lower()] = p
-
-        for _, row in products_df.iterrows():
-            name_norm = row["name"].strip().lower()
-            product = product_map.get(name_norm)
-
-            input_fields = []
-            output_fields = []
-            try:
-                if row.get("input_fields"):
-                    input_fields = json.loads(row["input_fields"]) if isinstance(row["input_fields"], str) else row["input_fields"]
-                if row.get("output_fields"):
-                    output_fields = json.loads(row["output_fields"]) if isinstance(row["output_fields"], str) else row["output_fields"]
-            except Exception:
-                pass
-
-            if product:
-                # Update existing product
-                product.description = row.get("description", product.description)
-                product.input_fields = input_fields
-                product.output_fields = output_fields
-            else:
-                # Create new product
-                product = models.Product(
-                    name=row["name"].strip(),
-                    description=row.get("description", ""),
-                    input_fields=input_fields,
-                    output_fields=output_fields,
-                    organization_id=user.organization_id
-                )
-                db.add(product)
-                db.flush()  # assign ID without committing
-                product_map[name_norm] = product
+def run_import_job(upload_id: int):
+    """Processes a queued FileUpload in its own session, recording progress on the row."""
+    from ..sheet_reader import FLAT_FILE_SHEET, file_kind, open_sheets, read_headers
 
+    db = SessionLocal()
+    upload = None
+    finished = False
+    try:
+        # Claim the row, so a job queued twice (e.g. by recovery) runs once
+        claimed = (
+            db.query(models.FileUpload)
+            .filter(
+                models.FileUpload.id == upload_id,
+                models.FileUpload.status == "uploaded",
+                models.FileUpload.worker_id == WORKER_ID,
+            )
+            .update({"status": "validating"}, synchronize_session=False)
+        )
         db.commit()
+        if not claimed:
+            return
+        upload = db.get(models.FileUpload, upload_id)
+
+        # Only headers are read here; rows are streamed during processing
+        required = ("Products", "Batches", "ShiftEntries") if file_kind(upload.file_path) == "xlsx" else (FLAT_FILE_SHEET,)
+        validation = validate_workbook(read_headers(upload.file_path), required_sheets=required)
+        if validation["errors"]:
+            upload.status = "failed"
+            upload.error_message = "\n".join(validation["errors"])
+            upload.processed_at = datetime.utcnow()
+            db.commit()
+            finished = True
+            return
 
-        # --- Step 3: Upload Batches ---
-        batches_df = df_dict["Batches"].fillna("")
-        print(f"📦 Batches sheet rows: {len(batches_df)}")
+        upload.status = "processing"
+        db.commit()
 
-        for _, row in batches_df.iterrows():
-            prod_name_norm = row["product_name"].strip().lower()
-            product = product_map.get(prod_name_norm)
-            if not product:
-                print(f"⚠️ Product not found for batch: {row['batch_number']}")
-                continue
-            print(f"➡️ Processing batch: {row['batch_number']} for product: {product.name}")
-            batch = db.query(models.Batch).filter_by(batch_number=row["batch_number"]).first()
-            if batch:
-                print(f"↩️ Batch exists: {batch.batch_number}, updating...")
-                batch.start_date = row.get("start_date", batch.start_date)
-                batch.end_date = row.get("end_date", batch.end_date)
-                batch.status = row.get("status", batch.status)
-            else:
-                batch = models.Batch(
-                    organization_id=user.organization_id,
-                    product_id=product.id,
-                    batch_number=row["batch_number"],
-                    start_date=row.get("start_date"),
-                    end_date=row.get("end_date"),
-                    status=row.get("status", "open")
-                )
-                print("✅ Creating batch:", batch.batch_number)
-                db.add(batch)
-                print("✅ Created batch:", batch.batch_number)
+        def progress(counters: dict):
+            upload.rows_processed = counters["rows_processed"]
+            upload.batches_created = counters["batches_created"]
+            upload.shifts_created = counters["shifts_created"]
+            db.commit()
 
+        sheets = open_sheets(upload.file_path)
+        result = process_workbook(db, upload.organization_id, str(upload.id), sheets, progress=progress)
+
+        upload.status = "processed"
+        upload.error_message = "\n".join(result["errors"]) or None
+        upload.processed_at = datetime.utcnow()
         db.commit()
+        finished = True
+    except Exception as e:
+        print(f"❌ Import {upload_id} failed:", e)
+        db.rollback()
+        upload = db.get(models.FileUpload, upload_id)
+        if upload is not None:
+            upload.status = "failed"
+            upload.error_message = str(e)
+            upload.processed_at = datetime.utcnow()
+            db.commit()
+            finished = True
+    finally:
+        # The file is only needed until the row reaches processed/failed
+        if finished:
+            _remove_upload_file(upload.file_path)
+        db.close()
 
-        # --- Step 4: Upload Shift Entries ---
-        shifts_df = df_dict["ShiftEntries"].fillna("")
-        print(f"📦 ShiftEntries sheet rows: {len(shifts_df)}")
 
-        for _, row in shifts_df.iterrows():
-            batch = db.query(models.Batch).filter_by(batch_number=row["batch_number"]).first()
-            if not batch:
-                print(f"⚠️ Batch not found for shift entry: {row['shift_no']} on {row['date']}")
-                continue
+def recover_import_jobs() -> dict:
+    """
+    Resumes imports orphaned by a restart (call once at startup).
 
-            shift = db.query(models.ShiftEntry).filter_by(
-                batch_id=batch.id,
-                date=row["date"],
-                shift_no=row["shift_no"]
-            ).first()
-
-            input_materials = {}
-            output_products = {}
-            try:
-                if row.get("input_materials"):
-                    input_materials = json.loads(row["input_materials"]) if isinstance(row["input_materials"], str) else row["input_materials"]
-                if row.get("output_products"):
-                    output_products = json.loads(row["output_products"]) if isinstance(row["output_products"], str) else row["output_products"]
-            except Exception:
-                pass
-
-            if shift:
-                # Update existing shift
-                shift.input_materials = input_materials
-                shift.output_products = output_products
-                shift.admin_notes = row.get("admin_notes", shift.admin_notes)
-            else:
-                # Create new shift
-                shift = models.ShiftEntry(
-                    batch_id=batch.id,
-                    organization_id=user.organization_id,
-                    date=row["date"],
-                    shift_no=row["shift_no"],
-                    input_materials=input_materials,
-                    output_products=output_products,
-                    admin_notes=row.get("admin_notes", "")
+    Unfinished uploads whose worker is gone are taken over with a
+    compare-and-set on worker_id, so concurrent workers never pick the same
+    row: queued ones whose file is still here are re-queued, interrupted
+    ones (validating/processing) are marked failed and their file deleted.
+    """
+    db = SessionLocal()
+    requeued, failed = [], 0
+    try:
+        rows = (
+            db.query(models.FileUpload.id, models.FileUpload.status,
+                     models.FileUpload.file_path, models.FileUpload.worker_id)
+            .filter(models.FileUpload.status.in_(UNFINISHED_STATUSES))
+            .all()
+        )
+        for upload_id, status, file_path, worker_id in rows:
+            if _worker_alive(worker_id):
+                continue
+            owner = (models.FileUpload.worker_id.is_(None) if worker_id is None
+                     else models.FileUpload.worker_id == worker_id)
+            resume = status == "uploaded" and os.path.exists(file_path)
+            values = {"worker_id": WORKER_ID}
+            if not resume:
+                values.update(
+                    status="failed",
+                    error_message="Import interrupted by a server restart; please upload the file again.",
+                    processed_at=datetime.utcnow(),
                 )
-                db.add(shift)
+            taken = (
+                db.query(models.FileUpload)
+                .filter(models.FileUpload.id == upload_id, models.FileUpload.status == status, owner)
+                .update(values, synchronize_session=False)
+            )
+            db.commit()
+            if not taken:
+                continue
+            if resume:
+                requeued.append(upload_id)
+            else:
+                _remove_upload_file(file_path)
+                failed += 1
+    finally:
+        db.close()
 
-        db.commit()
+    for upload_id in requeued:
+        _import_executor.submit(run_import_job, upload_id)
+    return {"requeued": len(requeued), "failed": failed}
 
-        return {"success": True, "message": "Excel uploaded and processed successfully."}
 
-    except Exception as e:
-        print("❌ Upload failed:", e)
-        raise HTTPException(status_code=500, detail=str(e))
+# ---------------------------------------------------------------------
+# Excel Upload Endpoint
+# ---------------------------------------------------------------------
+@router.post("/excel", status_code=202)
+def upload_excel(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    user = Depends(get_current_user)
+):
+    """
+    Saves the workbook to UPLOAD_DIR and queues it for a background import.
+    Accepts .xlsx workbooks, or .csv / .ndjson files holding ShiftEntries rows.
+    Poll GET /api/v1/uploads/{upload_id} for progress.
+    """
+    from ..sheet_reader import SUPPORTED_EXTENSIONS
+
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    if ext not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type '{ext}'. Use one of: {', '.join(sorted(SUPPORTED_EXTENSIONS))}")
+
+    file_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4().hex}_{os.path.basename(file.filename or 'upload.xlsx')}")
+    with open(file_path, "wb") as out:
+        shutil.copyfileobj(file.file, out)
+
+    upload = models.FileUpload(
+        organization_id=user.organization_id,
+        uploader_id=user.id,
+        file_path=file_path,
+        original_filename=file.filename,
+        status="uploaded",
+        worker_id=WORKER_ID
+    )
+    db.add(upload)
+    db.commit()
+    db.refresh(upload)
+
+    _import_executor.submit(run_import_job, upload.id)
+
+    return {
+        "success": True,
+        "message": "Excel uploaded; import queued.",
+        "upload_id": upload.id,
+        "status": upload.status
+    }
 
 
 # ---------------------------------------------------------------------
@@ -396,6 +486,8 @@ def download_excel_template():
     - Batches
     - ShiftEntries
     """
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment
 
     wb = Workbook()
 
@@ -466,3 +558,21 @@ def download_excel_template():
         headers={"Content-Disposition": 'attachment; filename="upload_template.xlsx"'}
     )
    
+
+
+# ---------------------------------------------------------------------
+# Import Status Endpoint
+# ---------------------------------------------------------------------
+@router.get("/{upload_id}", response_model=schemas.FileUploadResponse)
+def get_upload_status(
+    upload_id: int,
+    db: Session = Depends(get_db),
+    user = Depends(get_current_user)
+):
+    upload = db.query(models.FileUpload).filter(
+        models.FileUpload.id == upload_id,
+        models.FileUpload.organization_id == user.organization_id
+    ).first()
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return upload
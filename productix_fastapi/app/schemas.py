@@ -305,9 +305,34 @@ class ProductivityRecordsResponse(RootModel):
 
 
 
+class FileUploadResponse(BaseModel):
+    id: int
+    organization_id: int
+    original_filename: Optional[str] = None
+    status: str
+    rows_processed: Optional[int] = 0
+    batches_created: Optional[int] = 0
+    shifts_created: Optional[int] = 0
+    error_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    processed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 class AnalysisCountResponse(BaseModel):
     analysis_count: int
 
+class MaterialUsage(BaseModel):
+    field_name: str
+    kind: str                       # "input" | "output"
+    period: Optional[str]           # "2025-03" (month), "2025-03-01" (day), None (whole range)
+    amount: float
+    cost: float                     # inputs only; 0 for outputs
+    entries: int
+    cost_per_unit: Optional[float]  # average unit price of an input
+
 class AgentRequest(BaseModel):
     records: Dict[str, List[ProductRecord]]  # List of product records
     goal: str
@@ -327,3 +352,18 @@ class AIReportResponse(BaseModel):
         from_attributes = True
 
 
+
+
+class PoolMetricsResponse(BaseModel):
+    pool_class: str
+    pgbouncer_mode: bool
+    status: str
+    pool_size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    checked_out: Optional[int] = None
+    checked_in: Optional[int] = None
+    overflow: Optional[int] = None
+    checkouts: Optional[int] = None
+    timeouts: Optional[int] = None
+    wait_ms_avg: Optional[float] = None
+    wait_ms_max: Optional[float] = None
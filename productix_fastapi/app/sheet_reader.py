@@ -0,0 +1,107 @@
+# app/sheet_reader.py
+"""
+Streaming readers for import files.
+
+Sheets are yielded as DataFrames of at most `chunk_size` rows, so peak
+memory is bounded by the chunk size instead of the file size.
+
+- .xlsx: every sheet, read with openpyxl in read_only mode
+- .csv / .ndjson / .jsonl: a single ShiftEntries sheet
+"""
+import os
+from typing import Dict, Iterable, Iterator, List
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from .importer import IMPORT_CHUNK_SIZE
+
+XLSX_EXTENSIONS = {".xlsx", ".xlsm"}
+CSV_EXTENSIONS = {".csv"}
+NDJSON_EXTENSIONS = {".ndjson", ".jsonl"}
+SUPPORTED_EXTENSIONS = XLSX_EXTENSIONS | CSV_EXTENSIONS | NDJSON_EXTENSIONS
+
+# Sheet name used for single-table (CSV / NDJSON) uploads
+FLAT_FILE_SHEET = "ShiftEntries"
+
+
+def file_kind(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in XLSX_EXTENSIONS:
+        return "xlsx"
+    if ext in CSV_EXTENSIONS:
+        return "csv"
+    if ext in NDJSON_EXTENSIONS:
+        return "ndjson"
+    raise ValueError(f"Unsupported file type: {ext or path}")
+
+
+def _header(row) -> List[str]:
+    return [str(c).strip() if c is not None else f"column_{i}" for i, c in enumerate(row)]
+
+
+def iter_xlsx_sheet(path: str, sheet_name: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Yields one worksheet as DataFrame chunks without loading the workbook."""
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb[sheet_name].iter_rows(values_only=True)
+        columns = _header(next(rows, ()))
+        chunk = []
+        for row in rows:
+            if row is None or all(v is None for v in row):
+                continue
+            chunk.append(row[:len(columns)])
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=columns)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=columns)
+    finally:
+        wb.close()
+
+
+def iter_csv(path: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    yield from pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+
+
+def iter_ndjson(path: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    with pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False, convert_dates=False) as reader:
+        yield from reader
+
+
+def read_headers(path: str) -> Dict[str, pd.DataFrame]:
+    """Returns an empty DataFrame per sheet carrying only its columns (for validation)."""
+    kind = file_kind(path)
+    if kind == "xlsx":
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            return {
+                name: pd.DataFrame(columns=_header(next(wb[name].iter_rows(values_only=True), ())))
+                for name in wb.sheetnames
+            }
+        finally:
+            wb.close()
+    first = next(open_sheets(path, chunk_size=1)[FLAT_FILE_SHEET], pd.DataFrame())
+    return {FLAT_FILE_SHEET: first.iloc[0:0]}
+
+
+def open_sheets(path: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> Dict[str, Iterator[pd.DataFrame]]:
+    """Maps sheet name -> lazy iterator of DataFrame chunks."""
+    kind = file_kind(path)
+    if kind == "csv":
+        return {FLAT_FILE_SHEET: iter_csv(path, chunk_size)}
+    if kind == "ndjson":
+        return {FLAT_FILE_SHEET: iter_ndjson(path, chunk_size)}
+
+    wb = load_workbook(path, read_only=True)
+    try:
+        names = list(wb.sheetnames)
+    finally:
+        wb.close()
+    return {name: iter_xlsx_sheet(path, name, chunk_size) for name in names}
+
+
+def concat_chunks(chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """Materializes a (small) sheet from its chunks."""
+    frames = list(chunks)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
@@ -0,0 +1,46 @@
+# app/streaming.py
+"""
+Newline-delimited JSON (NDJSON) responses for large listings.
+"""
+import json
+from typing import Any, Callable
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Query, Session
+
+from .database import SessionLocal
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Rows fetched per round-trip from the server-side cursor
+STREAM_YIELD_PER = 500
+# Lines buffered before a write to the socket
+STREAM_FLUSH_LINES = 100
+
+
+def ndjson_response(
+    build_query: Callable[[Session], Query],
+    serialize: Callable[[Any], dict],
+) -> StreamingResponse:
+    """
+    Streams every row of a query as one JSON object per line.
+
+    The query runs in its own session on a server-side cursor (yield_per)
+    because the request's session is closed before the body is sent, so
+    memory stays flat however many rows the query returns.
+    """
+    def generate():
+        db = SessionLocal()
+        try:
+            lines = []
+            for row in build_query(db).yield_per(STREAM_YIELD_PER):
+                lines.append(json.dumps(serialize(row), default=str))
+                if len(lines) >= STREAM_FLUSH_LINES:
+                    yield "\n".join(lines) + "\n"
+                    lines = []
+            if lines:
+                yield "\n".join(lines) + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,412 @@
+# app/vector_index.py
+"""
+Per-organization vector index for chatbot retrieval.
+
+Products, batches and shifts are embedded offline with a hashing
+vectorizer (word unigrams + bigrams -> VECTOR_DIM signed buckets,
+L2-normalized), so no model download or network call is needed.
+Vectors live in a faiss inner-product index when faiss-cpu is installed:
+exact (IndexFlatIP) for small organizations, IVF with nprobe lists for
+organizations above VECTOR_IVF_MIN_DOCS documents. Without faiss a numpy
+matrix is searched by brute force.
+
+Each organization's index is built on its first query, in a background
+thread (one build per organization at a time); queries fall back to the
+recency ranking until it is ready. It is then kept up to date by the
+shift endpoints and imports (index_shift / index_documents /
+remove_document); writes made while a build runs are replayed on the new
+index. Edits add a fresh vector and tombstone the old one; the index is
+rebuilt in the background once tombstones outnumber live documents.
+
+Indexes live in each worker's memory, and those hooks only update the
+index of the worker that handled the write. So every VECTOR_REFRESH_INTERVAL
+seconds a query also compares the index with a per-kind DB high-water mark
+(max id and row count of the organization): rows added by other workers
+are embedded and added, a count that does not add up (rows deleted
+elsewhere) starts a background rebuild. Edits made by other workers are
+picked up by the rebuild every VECTOR_MAX_AGE seconds.
+
+Environment:
+    VECTOR_INDEX      "0" disables retrieval (chatbot falls back to recency)
+    VECTOR_DIM        embedding size (default 256)
+    VECTOR_TOP_K      records retrieved per query (default 40)
+    VECTOR_MIN_SCORE  cosine similarity below which hits are dropped (default 0.1)
+    VECTOR_IVF_MIN_DOCS / VECTOR_NPROBE  IVF switch-over size and lists probed
+    VECTOR_BUILD_WORKERS  concurrent index builds per process (default 1)
+    VECTOR_REFRESH_INTERVAL  seconds between high-water mark checks (default 5)
+    VECTOR_MAX_AGE    seconds after which an index is rebuilt (default 900)
+"""
+import os
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+from .context_builder import iter_batch_rows, iter_product_rows, iter_shift_rows, load_org_context, query_terms
+
+_faiss = None  # faiss module, False when not installed; imported on the first index build
+
+VECTOR_INDEX_ENABLED = os.getenv("VECTOR_INDEX", "1") != "0"
+VECTOR_DIM = int(os.getenv("VECTOR_DIM", "256"))
+VECTOR_TOP_K = int(os.getenv("VECTOR_TOP_K", "40"))
+VECTOR_MIN_SCORE = float(os.getenv("VECTOR_MIN_SCORE", "0.1"))
+VECTOR_IVF_MIN_DOCS = int(os.getenv("VECTOR_IVF_MIN_DOCS", "50000"))
+VECTOR_NPROBE = int(os.getenv("VECTOR_NPROBE", "16"))
+VECTOR_BUILD_WORKERS = int(os.getenv("VECTOR_BUILD_WORKERS", "1"))
+VECTOR_REFRESH_INTERVAL = float(os.getenv("VECTOR_REFRESH_INTERVAL", "5"))
+VECTOR_MAX_AGE = float(os.getenv("VECTOR_MAX_AGE", "900"))
+EMBED_BATCH = 2048
+
+KINDS = ("products", "batches", "shifts")
+
+
+# ---------------------------------------------------------------------
+# Embedding
+# ---------------------------------------------------------------------
+def _tokens(text: str) -> List[str]:
+    # Words with at least one letter; bare numbers add noise, not meaning
+    words = [w for w in re.findall(r"[a-z0-9][a-z0-9_\-]*", text.lower()) if any(c.isalpha() for c in w)]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def embed(texts: Iterable[str], dim: int = VECTOR_DIM) -> np.ndarray:
+    """Hashing-trick embeddings, one L2-normalized float32 row per text."""
+    texts = list(texts)
+    out = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in _tokens(text):
+            h = zlib.crc32(token.encode())
+            out[row, h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    np.divide(out, norms, out=out, where=norms > 0)
+    return out
+
+
+# ---------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------
+class _NumpyStore:
+    """Brute-force inner-product search, used when faiss is not installed."""
+
+    def __init__(self, dim: int):
+        self.vectors = np.zeros((1024, dim), dtype=np.float32)
+        self.ntotal = 0
+
+    def add(self, vectors: np.ndarray):
+        needed = self.ntotal + len(vectors)
+        if needed > len(self.vectors):
+            grown = np.zeros((max(needed, 2 * len(self.vectors)), self.vectors.shape[1]), dtype=np.float32)
+            grown[:self.ntotal] = self.vectors[:self.ntotal]
+            self.vectors = grown
+        self.vectors[self.ntotal:needed] = vectors
+        self.ntotal = needed
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self.vectors[:self.ntotal] @ query[0]
+        k = min(k, self.ntotal)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return scores[top][None, :], top[None, :]
+
+
+def _load_faiss():
+    global _faiss
+    if _faiss is None:
+        try:
+            import faiss
+        except ImportError:  # numpy fallback
+            faiss = False
+        _faiss = faiss
+    return _faiss or None
+
+
+def _make_store(vectors: np.ndarray):
+    """Exact flat index for small organizations, IVF (clustered) for large ones."""
+    n, dim = vectors.shape
+    faiss = _load_faiss()
+    if faiss is None:
+        store = _NumpyStore(dim)
+    elif n >= VECTOR_IVF_MIN_DOCS:
+        nlist = int(np.sqrt(n))
+        store = faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        sample = vectors[np.random.default_rng(0).choice(n, min(n, nlist * 40), replace=False)]
+        store.train(sample)
+        store.nprobe = VECTOR_NPROBE
+    else:
+        store = faiss.IndexFlatIP(dim)
+    if n:
+        store.add(vectors)
+    return store
+
+
+class OrgIndex:
+    """Vectors of one organization; labels are positions in `keys`."""
+
+    def __init__(self, keys: List[Tuple[str, int]], vectors: np.ndarray):
+        self.store = _make_store(vectors)
+        self.keys = list(keys)
+        self.current: Dict[Tuple[str, int], int] = {key: label for label, key in enumerate(self.keys)}
+        self.lock = threading.Lock()
+        # (max id, row count) per kind of the rows this index reflects
+        self.watermark: Dict[str, Tuple[int, int]] = {}
+        self.built_at = self.checked_at = time.monotonic()
+        self.refresh_lock = threading.Lock()
+
+    @property
+    def stale(self) -> int:
+        return len(self.keys) - len(self.current)
+
+    def add(self, docs: List[Tuple[str, int, str]]):
+        """Adds (kind, id, text) documents; re-adding a key replaces it."""
+        if not docs:
+            return
+        vectors = embed(text for _, _, text in docs)
+        with self.lock:
+            self.store.add(vectors)
+            for kind, row_id, _ in docs:
+                self.current[(kind, row_id)] = len(self.keys)
+                self.keys.append((kind, row_id))
+
+    def remove(self, kind: str, row_id: int):
+        with self.lock:
+            self.current.pop((kind, row_id), None)
+
+    def search(self, query: str, k: int) -> Dict[str, List[int]]:
+        """Top-k live documents per kind, best first."""
+        vector = embed([" ".join(query_terms(query))])
+        hits = {kind: [] for kind in KINDS}
+        if not vector.any():
+            return hits
+        with self.lock:
+            fetch = min(len(self.keys), k + self.stale)
+            if fetch == 0:
+                return hits
+            scores, labels = self.store.search(vector, fetch)
+            found = 0
+            for score, label in zip(scores[0], labels[0]):
+                if label < 0 or score < VECTOR_MIN_SCORE:
+                    continue
+                key = self.keys[label]
+                if self.current.get(key) != label:
+                    continue  # tombstoned
+                hits[key[0]].append(key[1])
+                found += 1
+                if found >= k:
+                    break
+        return hits
+
+
+_indexes: Dict[int, OrgIndex] = {}
+_building: Dict[int, Future] = {}
+# Writes seen while an organization's index is being built, replayed on the
+# new index: ("index", kind, ids) or ("remove", kind, id)
+_pending: Dict[int, list] = {}
+_indexes_lock = threading.Lock()
+_build_executor = ThreadPoolExecutor(max_workers=VECTOR_BUILD_WORKERS, thread_name_prefix="vector-build")
+
+_ROW_ITERATORS = {"products": iter_product_rows, "batches": iter_batch_rows, "shifts": iter_shift_rows}
+_MODELS = {"products": models.Product, "batches": models.Batch, "shifts": models.ShiftEntry}
+
+
+def _watermark(db: Session, organization_id: int) -> Dict[str, Tuple[int, int]]:
+    """(max id, row count) per kind; served by the (organization_id, ...) indexes."""
+    marks = {}
+    for kind, model in _MODELS.items():
+        max_id, count = (
+            db.query(func.max(model.id), func.count(model.id))
+            .filter(model.organization_id == organization_id)
+            .one()
+        )
+        marks[kind] = (max_id or 0, count)
+    return marks
+
+
+def _doc_text(cells: List[str]) -> str:
+    return " ".join(cells)
+
+
+def build_index(db: Session, organization_id: int) -> OrgIndex:
+    """Embeds every product, batch and shift of an organization (streamed)."""
+    # Taken first: rows written during the build are re-added by the next refresh
+    marks = _watermark(db, organization_id)
+    keys = []
+    blocks = []
+    for kind, rows in (
+        ("products", iter_product_rows(db, organization_id, limit=None)),
+        ("batches", iter_batch_rows(db, organization_id, limit=None)),
+        ("shifts", iter_shift_rows(db, organization_id, limit=None)),
+    ):
+        texts = []
+        for row_id, cells in rows:
+            keys.append((kind, row_id))
+            texts.append(_doc_text(cells))
+            if len(texts) >= EMBED_BATCH:
+                blocks.append(embed(texts))
+                texts = []
+        if texts:
+            blocks.append(embed(texts))
+    vectors = np.vstack(blocks) if blocks else np.zeros((0, VECTOR_DIM), dtype=np.float32)
+    index = OrgIndex(keys, vectors)
+    index.watermark = marks
+    print(f"🧭 Vector index built for org {organization_id}: {len(keys)} documents")
+    return index
+
+
+def _add_documents(db: Session, index: OrgIndex, organization_id: int, kind: str, ids: Iterable[int]):
+    ids = list(ids)
+    for start in range(0, len(ids), EMBED_BATCH):
+        rows = _ROW_ITERATORS[kind](db, organization_id, ids=ids[start:start + EMBED_BATCH], limit=None)
+        index.add([(kind, row_id, _doc_text(cells)) for row_id, cells in rows])
+
+
+def _replay(db: Session, index: OrgIndex, organization_id: int, ops: list):
+    for op, kind, target in ops:
+        if op == "remove":
+            index.remove(kind, target)
+        else:
+            _add_documents(db, index, organization_id, kind, target)
+
+
+def _build_in_background(organization_id: int):
+    db = SessionLocal()
+    try:
+        index = build_index(db, organization_id)
+        with _indexes_lock:
+            _indexes[organization_id] = index
+            ops = _pending.pop(organization_id, [])
+        _replay(db, index, organization_id, ops)
+    except Exception as e:
+        print(f"❌ Vector index build failed for org {organization_id}:", e)
+        with _indexes_lock:
+            _pending.pop(organization_id, None)
+    finally:
+        with _indexes_lock:
+            _building.pop(organization_id, None)
+        db.close()
+
+
+def get_index(organization_id: int, rebuild: bool = False) -> Optional[OrgIndex]:
+    """
+    The organization's index, or None while its first build runs. Starts a
+    background build when there is no index, it is mostly tombstones or
+    `rebuild` is set; the current index keeps serving until it is replaced.
+    """
+    with _indexes_lock:
+        index = _indexes.get(organization_id)
+        needs_build = rebuild or index is None or index.stale > max(1000, len(index.current))
+        if needs_build and organization_id not in _building:
+            _pending[organization_id] = []
+            _building[organization_id] = _build_executor.submit(_build_in_background, organization_id)
+    return index
+
+
+def _refresh(db: Session, organization_id: int, index: OrgIndex) -> bool:
+    """
+    Catches the index up with rows other workers added since its high-water
+    mark. Returns True when it must be rebuilt instead (too old, or rows
+    were deleted elsewhere).
+    """
+    now = time.monotonic()
+    if now - index.built_at > VECTOR_MAX_AGE:
+        return True
+    if now - index.checked_at < VECTOR_REFRESH_INTERVAL or not index.refresh_lock.acquire(blocking=False):
+        return False
+    try:
+        index.checked_at = now
+        for kind, (max_id, count) in _watermark(db, organization_id).items():
+            old_max, old_count = index.watermark.get(kind, (0, 0))
+            new_ids = []
+            if max_id > old_max:
+                model = _MODELS[kind]
+                new_ids = [
+                    row_id for (row_id,) in db.query(model.id)
+                    .filter(model.organization_id == organization_id, model.id > old_max, model.id <= max_id)
+                ]
+                _add_documents(db, index, organization_id, kind, new_ids)
+            if count != old_count + len(new_ids):
+                return True
+            index.watermark[kind] = (max_id if new_ids else old_max, count)
+        return False
+    finally:
+        index.refresh_lock.release()
+
+
+def wait_for_build(organization_id: int, timeout: Optional[float] = None):
+    """Blocks until a running build of the organization's index finishes (used by checks)."""
+    with _indexes_lock:
+        future = _building.get(organization_id)
+    if future is not None:
+        future.result(timeout)
+
+
+def search(db: Session, organization_id: int, query: str, k: int = VECTOR_TOP_K) -> Optional[Dict[str, List[int]]]:
+    """Record ids most similar to the query, or None when retrieval is disabled or the index is not built yet."""
+    if not VECTOR_INDEX_ENABLED:
+        return None
+    index = get_index(organization_id)
+    if index is None:
+        return None
+    if _refresh(db, organization_id, index):
+        get_index(organization_id, rebuild=True)
+    return index.search(query, k)
+
+
+def retrieve_context(db: Session, organization_id: int, query: str, budget_tokens: Optional[int] = None):
+    """
+    Context for a chatbot prompt: the top-k similar records packed into the
+    token budget, or the most recent records when nothing matches.
+    """
+    hits = search(db, organization_id, query)
+    if hits is not None and not any(hits.values()):
+        hits = None
+    return load_org_context(db, organization_id, query, budget_tokens, record_ids=hits)
+
+
+def index_documents(db: Session, organization_id: int, kind: str, ids: Iterable[int]):
+    """
+    Re-embeds the given records after a write (e.g. an import). No-op until
+    the organization's index exists; queued while a build is running.
+    """
+    ids = list(ids)
+    if not ids:
+        return
+    with _indexes_lock:
+        index = _indexes.get(organization_id)
+        pending = _pending.get(organization_id)
+        if pending is not None:
+            pending.append(("index", kind, ids))
+    if index is not None:
+        _add_documents(db, index, organization_id, kind, ids)
+
+
+def index_shift(db: Session, organization_id: int, shift_id: int):
+    """Re-embeds one shift after a write."""
+    index_documents(db, organization_id, "shifts", [shift_id])
+
+
+def remove_document(organization_id: int, kind: str, row_id: int):
+    with _indexes_lock:
+        index = _indexes.get(organization_id)
+        pending = _pending.get(organization_id)
+        if pending is not None:
+            pending.append(("remove", kind, row_id))
+    if index is not None:
+        index.remove(kind, row_id)
+        # A delete made here is not a reason to rebuild on the next refresh
+        max_id, count = index.watermark.get(kind, (0, 0))
+        if row_id <= max_id:
+            index.watermark[kind] = (max_id, count - 1)
+
+
+def invalidate(organization_id: int):
+    """Drops an organization's index; it is rebuilt in the background on the next query."""
+    with _indexes_lock:
+        _indexes.pop(organization_id, None)
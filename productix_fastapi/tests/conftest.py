@@ -0,0 +1,58 @@
+# tests/conftest.py
+import atexit
+import os
+import shutil
+import tempfile
+import uuid
+
+import pytest
+
+# app.database refuses to import without DATABASE_URL; unless one is given,
+# the tests run against a throwaway SQLite file
+_tmp_dir = tempfile.mkdtemp(prefix="productix-tests-")
+atexit.register(shutil.rmtree, _tmp_dir, ignore_errors=True)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}")
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="session")
+def migrated_engine(tmp_path_factory):
+    """
+    A temporary database built by `alembic upgrade head`, of the same
+    dialect as DATABASE_URL (a new database on the same Postgres server, or
+    a SQLite file), so schema checks see what the migrations create.
+    """
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import create_engine
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.pool import NullPool
+
+    from app.database import DATABASE_URL
+
+    url = make_url(DATABASE_URL)
+    server = None
+    if url.get_backend_name() == "postgresql":
+        name = f"productix_migrations_{uuid.uuid4().hex[:8]}"
+        server = create_engine(url, isolation_level="AUTOCOMMIT", poolclass=NullPool)
+        with server.connect() as conn:
+            conn.exec_driver_sql(f'CREATE DATABASE "{name}"')
+        test_url = url.set(database=name)
+    else:
+        test_url = f"sqlite:///{tmp_path_factory.mktemp('migrations') / 'migrated.db'}"
+
+    engine = create_engine(test_url, poolclass=NullPool)
+    config = Config(os.path.join(PROJECT_DIR, "alembic.ini"))
+    # Alembic manages the transactions (some revisions run in autocommit blocks)
+    with engine.connect() as conn:
+        config.attributes["connection"] = conn
+        command.upgrade(config, "head")
+
+    yield engine
+
+    engine.dispose()
+    if server is not None:
+        with server.connect() as conn:
+            conn.exec_driver_sql(f'DROP DATABASE "{name}"')
+        server.dispose()
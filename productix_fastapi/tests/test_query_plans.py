@@ -0,0 +1,131 @@
+# tests/test_query_plans.py
+"""
+Checks that the hot tenant-scoped queries are served by an index.
+
+Both run against a temporary database built by `alembic upgrade head`
+(see conftest.py), so an index declared on a model without a migration
+fails here. The index checks compare that schema with the indexes the hot
+queries need (GIN indexes only on Postgres). The EXPLAIN checks fail on a
+full table scan:
+
+    Postgres  "Seq Scan" with enable_seqscan off (so small tables still show
+              whether an index *can* serve the query)
+    SQLite    "SCAN <table>" without an index in EXPLAIN QUERY PLAN
+
+Other dialects skip them. Run only these with `pytest -m explain`.
+"""
+from datetime import date
+from typing import List, Tuple
+
+import pytest
+from sqlalchemy import func, inspect, select
+
+from app.models import AIAnalysis, Batch, BatchStatus, Product, ShiftEntry, ShiftLineItem
+
+ORG_ID = 1
+BATCH_ID = 1
+PRODUCT_ID = 1
+
+# Trigram indexes are left out: they depend on the pg_trgm extension
+HOT_INDEXES = [
+    ("ai_analysis", "ix_ai_analysis_org_id"),
+    ("products", "ix_products_org_name"),
+    ("batches", "ix_batches_org_batch_number"),
+    ("batches", "ix_batches_org_product_id"),
+    ("batches", "ix_batches_org_status"),
+    ("batches", "ix_batches_product_start_date"),
+    ("shift_entries", "ix_shift_entries_org_date"),
+    ("shift_entries", "ix_shift_entries_org_id"),
+    ("shift_entries", "ix_shift_entries_batch_date_shift"),
+    ("shift_line_items", "ix_shift_line_items_org_field_date"),
+    ("shift_line_items", "ix_shift_line_items_batch_kind_field"),
+]
+POSTGRES_INDEXES = [
+    ("shift_entries", "ix_shift_entries_input_materials_gin"),
+    ("shift_entries", "ix_shift_entries_output_products_gin"),
+]
+
+
+def _hot_queries() -> List[Tuple[str, object]]:
+    today = date.today()
+    return [
+        ("dashboard shifts_today",
+         select(func.count(ShiftEntry.id)).where(ShiftEntry.organization_id == ORG_ID, ShiftEntry.date == today)),
+        ("dashboard running_batches",
+         select(func.count(Batch.id)).where(Batch.organization_id == ORG_ID, Batch.status == BatchStatus.open)),
+        ("create_batch last batch",
+         select(Batch.batch_number).where(Batch.product_id == PRODUCT_ID, Batch.organization_id == ORG_ID)
+         .order_by(Batch.id.desc()).limit(1)),
+        ("batch shift trend",
+         select(ShiftEntry.id).join(Batch, ShiftEntry.batch_id == Batch.id)
+         .where(ShiftEntry.batch_id == BATCH_ID, Batch.organization_id == ORG_ID)
+         .order_by(ShiftEntry.date.desc(), ShiftEntry.shift_no.desc()).limit(3)),
+        ("importer existing shifts",
+         select(ShiftEntry.id, ShiftEntry.import_hash)
+         .where(ShiftEntry.batch_id.in_([BATCH_ID, BATCH_ID + 1]), ShiftEntry.date.in_([today]))),
+        ("importer batch numbers",
+         select(Batch.id).where(Batch.organization_id == ORG_ID, Batch.batch_number.in_(["BATCH-001", "BATCH-002"]))),
+        ("productivity records page",
+         select(ShiftEntry.id, Product.name).join(Batch, ShiftEntry.batch_id == Batch.id)
+         .join(Product, Batch.product_id == Product.id)
+         .where(ShiftEntry.organization_id == ORG_ID, ShiftEntry.id > 0).order_by(ShiftEntry.id).limit(500)),
+        ("recent shifts",
+         select(ShiftEntry.id).where(ShiftEntry.organization_id == ORG_ID)
+         .order_by(ShiftEntry.date.desc()).limit(50)),
+        ("product recent batches",
+         select(Batch.id).where(Batch.product_id == PRODUCT_ID).order_by(Batch.start_date.desc()).limit(5)),
+        ("rollup rebuild",
+         select(ShiftEntry.id).where(ShiftEntry.batch_id.in_([BATCH_ID])).order_by(ShiftEntry.batch_id, ShiftEntry.id)),
+        ("material usage",
+         select(ShiftLineItem.date, func.sum(ShiftLineItem.amount))
+         .where(ShiftLineItem.organization_id == ORG_ID, ShiftLineItem.field_name == "steel",
+                ShiftLineItem.date >= today).group_by(ShiftLineItem.date)),
+        ("batch line items",
+         select(ShiftLineItem.kind, ShiftLineItem.field_name, func.sum(ShiftLineItem.amount))
+         .where(ShiftLineItem.batch_id == BATCH_ID).group_by(ShiftLineItem.kind, ShiftLineItem.field_name)),
+        ("analysis count",
+         select(func.count(AIAnalysis.id)).where(AIAnalysis.organization_id == ORG_ID)),
+    ]
+
+
+def _postgres_plan(conn, sql: str) -> Tuple[List[str], bool]:
+    lines = [row[0] for row in conn.exec_driver_sql("EXPLAIN " + sql)]
+    return lines, not any("Seq Scan" in line for line in lines)
+
+
+def _sqlite_plan(conn, sql: str) -> Tuple[List[str], bool]:
+    lines = [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+    return lines, not any(line.startswith("SCAN ") and "INDEX" not in line for line in lines)
+
+
+@pytest.mark.parametrize("table, index", HOT_INDEXES + POSTGRES_INDEXES)
+def test_hot_index_exists(migrated_engine, table, index):
+    if (table, index) in POSTGRES_INDEXES and migrated_engine.dialect.name != "postgresql":
+        pytest.skip("GIN indexes are Postgres only")
+    assert index in {ix["name"] for ix in inspect(migrated_engine).get_indexes(table)}
+
+
+def test_shift_key_is_unique(migrated_engine):
+    # The importer inserts with ON CONFLICT on this key
+    indexes = {ix["name"]: ix for ix in inspect(migrated_engine).get_indexes("shift_entries")}
+    assert indexes["ix_shift_entries_batch_date_shift"]["unique"]
+
+
+@pytest.mark.explain
+@pytest.mark.parametrize("name, statement", _hot_queries(), ids=[name for name, _ in _hot_queries()])
+def test_hot_query_uses_an_index(migrated_engine, name, statement):
+    dialect = migrated_engine.dialect.name
+    if dialect == "postgresql":
+        explain = _postgres_plan
+    elif dialect == "sqlite":
+        explain = _sqlite_plan
+    else:
+        pytest.skip(f"no plan check for {dialect}")
+
+    with migrated_engine.connect() as conn:
+        if dialect == "postgresql":
+            conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+        lines, ok = explain(conn, sql)
+        conn.rollback()
+    assert ok, f"{name} uses a sequential scan:\n" + "\n".join(lines)
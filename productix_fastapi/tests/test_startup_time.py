@@ -0,0 +1,67 @@
+# tests/test_startup_time.py
+"""
+Startup-time budget check.
+
+Imports app.main1 in fresh interpreters and checks that:
+
+- importing needs no database: DATABASE_URL points at a closed port, so
+  any connection attempt during import fails the import
+- none of the heavy libraries is imported at startup (they belong inside
+  the routes that use them)
+- the import stays within STARTUP_BUDGET_MS (median of STARTUP_RUNS runs)
+
+`python -X importtime -c "import app.main1"` shows where the time goes.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ("pandas", "openpyxl", "reportlab", "google.generativeai", "faiss")
+RUNS = int(os.getenv("STARTUP_RUNS", "3"))
+BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1500"))
+
+# Nothing listens on port 9, so a connection attempt fails instead of hanging
+UNREACHABLE_DATABASE_URL = "postgresql://startup-check@127.0.0.1:9/startup_check"
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import app.main1
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "ms": elapsed * 1000,
+    "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+@pytest.fixture(scope="module")
+def probes():
+    env = dict(os.environ, DATABASE_URL=UNREACHABLE_DATABASE_URL)
+    results = []
+    for _ in range(RUNS):
+        result = subprocess.run([sys.executable, "-c", _PROBE], cwd=PROJECT_DIR, env=env,
+                                capture_output=True, text=True)
+        assert result.returncode == 0, f"importing app.main1 failed (does it connect to the database?)\n{result.stderr}"
+        results.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def test_startup_loads_no_heavy_modules(probes):
+    heavy = sorted({m for probe in probes for m in probe["heavy"]})
+    assert not heavy, f"heavy modules imported at startup: {', '.join(heavy)}"
+
+
+def test_startup_within_budget(probes):
+    timings = [probe["ms"] for probe in probes]
+    median = statistics.median(timings)
+    assert median <= BUDGET_MS, (
+        f"import app.main1 takes {median:.0f} ms (median of {RUNS}, min {min(timings):.0f}, "
+        f"max {max(timings):.0f}), over the {BUDGET_MS:.0f} ms budget"
+    )